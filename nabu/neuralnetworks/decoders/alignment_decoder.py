@@ -33,8 +33,12 @@ class AlignmentDecoder(decoder.Decoder):
             #compute the log probabilities
             logprobs = tf.log(tf.nn.softmax(logits.values()[0]))
 
-            #read the pd prior
-            prior = np.load(self.conf['prior'])
+            #read the pd prior, the prior can also be given as a data
+            #directory whose statistics were computed with compute_stats
+            if os.path.isdir(self.conf['prior']):
+                prior = np.load(os.path.join(self.conf['prior'], 'prior.npy'))
+            else:
+                prior = np.load(self.conf['prior'])
 
             #compute posterior to pseudo likelihood
             loglikes = logprobs - np.log(prior)
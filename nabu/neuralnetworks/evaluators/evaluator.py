@@ -65,20 +65,38 @@ class Evaluator(object):
             #cut the data so it has a whole numbe of batches
             data_queue_elements = data_queue_elements[:numbatches*batch_size]
 
-            #create a queue to hold the filenames
-            data_queue = tf.train.string_input_producer(
-                string_tensor=data_queue_elements,
-                shuffle=False,
-                seed=None,
-                capacity=batch_size*2)
-
-            #create the input pipeline
-            data, seq_length, _ = input_pipeline.input_pipeline(
-                data_queue=data_queue,
-                batch_size=batch_size,
-                numbuckets=1,
-                dataconfs=self.input_dataconfs + self.target_dataconfs
-            )
+            #read the examples of a batch together
+            batched_reads = self.conf.get('batched_reads', 'False') == 'True'
+
+            if self.conf.get('input_pipeline', 'queue') == 'dataset':
+
+                #create the input pipeline with a tf.data dataset
+                data, seq_length, _ = input_pipeline.dataset_pipeline(
+                    data_queue_elements=data_queue_elements,
+                    batch_size=batch_size,
+                    numbuckets=1,
+                    dataconfs=self.input_dataconfs + self.target_dataconfs,
+                    shuffle=False,
+                    batched_reads=batched_reads
+                )
+
+            else:
+
+                #create a queue to hold the filenames
+                data_queue = tf.train.string_input_producer(
+                    string_tensor=data_queue_elements,
+                    shuffle=False,
+                    seed=None,
+                    capacity=batch_size*2)
+
+                #create the input pipeline
+                data, seq_length, _ = input_pipeline.input_pipeline(
+                    data_queue=data_queue,
+                    batch_size=batch_size,
+                    numbuckets=1,
+                    dataconfs=self.input_dataconfs + self.target_dataconfs,
+                    batched_reads=batched_reads
+                )
 
             inputs = {
                 self.model.input_names[i]: d
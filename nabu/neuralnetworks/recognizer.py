@@ -55,22 +55,42 @@ class Recognizer(object):
             self.numbatches = int(math.ceil(
                 float(len(data_queue_elements))/self.batch_size))
 
-            #create a queue to hold the filenames
-            data_queue = tf.train.string_input_producer(
-                string_tensor=data_queue_elements,
-                num_epochs=1,
-                shuffle=False,
-                seed=None,
-                capacity=self.batch_size*2)
-
-            #create the input pipeline
-            inputs, input_seq_length, _ = input_pipeline.input_pipeline(
-                data_queue=data_queue,
-                batch_size=self.batch_size,
-                numbuckets=1,
-                allow_smaller_final_batch=True,
-                dataconfs=self.input_dataconfs
-            )
+            #read the examples of a batch together
+            batched_reads = self.conf.get('batched_reads', 'False') == 'True'
+
+            if self.conf.get('input_pipeline', 'queue') == 'dataset':
+
+                #create the input pipeline with a tf.data dataset
+                inputs, input_seq_length, _ = input_pipeline.dataset_pipeline(
+                    data_queue_elements=data_queue_elements,
+                    batch_size=self.batch_size,
+                    numbuckets=1,
+                    allow_smaller_final_batch=True,
+                    dataconfs=self.input_dataconfs,
+                    shuffle=False,
+                    num_epochs=1,
+                    batched_reads=batched_reads
+                )
+
+            else:
+
+                #create a queue to hold the filenames
+                data_queue = tf.train.string_input_producer(
+                    string_tensor=data_queue_elements,
+                    num_epochs=1,
+                    shuffle=False,
+                    seed=None,
+                    capacity=self.batch_size*2)
+
+                #create the input pipeline
+                inputs, input_seq_length, _ = input_pipeline.input_pipeline(
+                    data_queue=data_queue,
+                    batch_size=self.batch_size,
+                    numbuckets=1,
+                    allow_smaller_final_batch=True,
+                    dataconfs=self.input_dataconfs,
+                    batched_reads=batched_reads
+                )
 
             inputs = {
                 self.model.input_names[i]: d
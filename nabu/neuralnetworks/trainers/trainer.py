@@ -7,7 +7,7 @@ import cPickle as pickle
 from abc import ABCMeta, abstractmethod
 import tensorflow as tf
 from tensorflow.python.client import device_lib
-from nabu.processing import input_pipeline
+from nabu.processing import input_pipeline, corpus_cache
 from nabu.neuralnetworks.trainers import loss_functions
 from nabu.neuralnetworks.models.model import Model
 from nabu.neuralnetworks.evaluators import evaluator_factory
@@ -289,6 +289,52 @@ class Trainer(object):
             for section in sectionset:
                 target_dataconfs[-1].append(dict(self.dataconf.items(section)))
 
+        #the batch sizes are derived from a budget of padded frames if
+        #batch_frames is set
+        if 'batch_frames' in self.conf:
+            batch_frames = int(self.conf['batch_frames'])
+        else:
+            batch_frames = None
+
+        #the decoded examples are kept in memory after the first epoch if
+        #cache_memory (in MB) is set, the examples that do not fit are spilled
+        #to a file in cache_dir
+        if 'cache_memory' in self.conf:
+            cache = corpus_cache.CorpusCache(
+                int(float(self.conf['cache_memory'])*2**20),
+                self.conf.get('cache_dir'))
+        else:
+            cache = None
+
+        #the data is read with a tf.data dataset if input_pipeline is dataset,
+        #the distributed training shares a data queue between the workers so
+        #it always uses queues
+        if (chief_ps is None and
+                self.conf.get('input_pipeline', 'queue') == 'dataset'):
+
+            #get the filenames
+            data_queue_elements, _ = input_pipeline.get_filenames(
+                input_dataconfs + target_dataconfs)
+
+            #create the input pipeline
+            data, seq_length, num_steps = input_pipeline.dataset_pipeline(
+                data_queue_elements=data_queue_elements,
+                batch_size=int(self.conf['batch_size']),
+                numbuckets=int(self.conf['numbuckets']),
+                dataconfs=input_dataconfs + target_dataconfs,
+                variable_batch_size=(
+                    self.conf['variable_batch_size'] == 'True'),
+                num_parallel_reads=int(
+                    self.conf.get('num_parallel_reads', 4)),
+                batched_reads=(
+                    self.conf.get('batched_reads', 'False') == 'True'),
+                batch_frames=batch_frames,
+                cache=cache
+            )
+
+            return self._split_data(
+                data, seq_length, num_steps, input_names, output_names)
+
         #check if running in distributed model
         if chief_ps is None:
 
@@ -322,21 +368,47 @@ class Trainer(object):
             numbuckets=int(self.conf['numbuckets']),
             dataconfs=input_dataconfs + target_dataconfs,
             variable_batch_size=(
-                self.conf['variable_batch_size'] == 'True')
+                self.conf['variable_batch_size'] == 'True'),
+            batched_reads=self.conf.get('batched_reads', 'False') == 'True',
+            batch_frames=batch_frames,
+            cache=cache
         )
 
+        return self._split_data(
+            data, seq_length, num_steps, input_names, output_names)
+
+    def _split_data(self, data, seq_length, num_steps, input_names,
+                    output_names):
+        '''split the data of the input pipeline in inputs and targets
+
+        Args:
+            data: the data elements as a list of [batch_size x ...] tensor
+            seq_length: the sequence lengths as a list of [batch_size] tensor
+            num_steps: the number of steps in each epoch
+            input_names: the names of the inputs
+            output_names: the names of the targets
+
+        Returns:
+            - the inputs as a dictionary of [batch_size x ...] tensors
+            - the input sequence lengths as a dictionary of [batch_size]
+                tensors
+            - the targets as a dictionary of [batch_size x ...] tensors
+            - the target sequence lengths as a dictionary of [batch_size]
+                tensors
+            - the number of steps in each epoch'''
+
         inputs = {
             input_names[i]: d
-            for i, d in enumerate(data[:len(input_sections)])}
+            for i, d in enumerate(data[:len(input_names)])}
         input_seq_length = {
             input_names[i]: d
-            for i, d in enumerate(seq_length[:len(input_sections)])}
+            for i, d in enumerate(seq_length[:len(input_names)])}
         targets = {
             output_names[i]: d
-            for i, d in enumerate(data[len(input_sections):])}
+            for i, d in enumerate(data[len(input_names):])}
         target_seq_length = {
             output_names[i]: d
-            for i, d in enumerate(seq_length[len(input_sections):])}
+            for i, d in enumerate(seq_length[len(input_names):])}
 
         return inputs, input_seq_length, targets, target_seq_length, num_steps
 
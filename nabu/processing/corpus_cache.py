@@ -0,0 +1,104 @@
+'''@file corpus_cache.py
+contains the CorpusCache class'''
+
+import os
+import tempfile
+import threading
+import numpy as np
+
+class CorpusCache(object):
+    '''keeps the decoded examples in memory so they are only read and decoded
+    in the first epoch
+
+    The examples are kept in memory until the memory cap is reached, the
+    examples that do not fit are spilled to a file that is memory mapped when
+    they are read. The spill file is created with the cache and removed when
+    it is opened, so it disappears when the process ends.'''
+
+    def __init__(self, max_memory, spill_dir=None):
+        '''CorpusCache constructor
+
+        Args:
+            max_memory: the maximal number of bytes that are kept in memory
+            spill_dir: the directory where the spill file is created, if None
+                the default temporary directory is used
+        '''
+
+        self.max_memory = max_memory
+
+        #the cached examples, an example in memory is a numpy array and a
+        #spilled example is the offset, the type and the shape in the file
+        self.examples = dict()
+        self.memory = 0
+
+        #the spill file, its size and its memory map. The file is created
+        #here and not when the first example is spilled, because put runs in
+        #the input pipeline where creating a temporary file can deadlock
+        fid, filename = tempfile.mkstemp(prefix='corpus_cache', dir=spill_dir)
+        self.spill_file = os.fdopen(fid, 'w+b')
+        os.remove(filename)
+        self.size = 0
+        self.mapped = None
+
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        '''get an example from the cache
+
+        Args:
+            key: the key of the example
+
+        Returns:
+            the example as a numpy array, None if the example is not cached
+        '''
+
+        example = self.examples.get(key)
+        if example is None or isinstance(example, np.ndarray):
+            return example
+
+        offset, dtype, shape = example
+        nbytes = int(np.prod(shape))*dtype.itemsize
+        if not nbytes:
+            return np.zeros(shape, dtype)
+
+        return np.asarray(
+            self._map(offset + nbytes)[offset:offset + nbytes].view(dtype)
+        ).reshape(shape)
+
+    def put(self, key, example):
+        '''add an example to the cache
+
+        Args:
+            key: the key of the example
+            example: the example as a numpy array
+        '''
+
+        example = np.ascontiguousarray(example)
+
+        with self.lock:
+            if key in self.examples:
+                return
+
+            if self.memory + example.nbytes <= self.max_memory:
+                self.examples[key] = example
+                self.memory += example.nbytes
+                return
+
+            #spill the example to the end of the spill file
+            self.spill_file.seek(self.size)
+            self.spill_file.write(example.tostring())
+            self.spill_file.flush()
+            self.examples[key] = (self.size, example.dtype, example.shape)
+            self.size += example.nbytes
+
+    def _map(self, size):
+        '''get a memory map of the spill file that contains the first size
+        bytes, the file is mapped again if it has grown'''
+
+        with self.lock:
+            if self.mapped is None or self.mapped.size < size:
+                self.mapped = np.memmap(
+                    self.spill_file, dtype=np.uint8, mode='r',
+                    shape=(self.size,))
+
+            return self.mapped
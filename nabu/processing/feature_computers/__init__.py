@@ -2,4 +2,4 @@
 contains all the feature computers that are used in feature computation'''
 
 from . import base, sigproc, feature_computer, fbank, mfcc, \
-feature_computer_factory
+feature_computer_factory, online_feature_computer
@@ -52,7 +52,7 @@ def raw(signal):
 
 
 
-def mfcc(signal, samplerate, conf):
+def mfcc(signal, samplerate, conf, operators=None):
     '''
     Compute MFCC features from an audio signal.
 
@@ -61,6 +61,8 @@ def mfcc(signal, samplerate, conf):
             N*1 array
         samplerate: the samplerate of the signal we are working with.
         conf: feature configuration
+        operators: the operators computed with get_operators, computed from
+            the configuration if not given
 
     Returns:
         A numpy array of size (NUMFRAMES by numcep) containing features. Each
@@ -68,13 +70,34 @@ def mfcc(signal, samplerate, conf):
         log-energy
     '''
 
-    feat, energy = fbank(signal, samplerate, conf)
+    if operators is None:
+        operators = get_operators(samplerate, conf)
+
+    return mfcc_frames(framing(signal, samplerate, conf), conf, operators)
+
+def mfcc_frames(frames, conf, operators):
+    '''
+    Compute MFCC features from the frames of an audio signal.
+
+    Args:
+        frames: the preemphasized frames (see framing)
+        conf: feature configuration
+        operators: the operators computed with get_operators
+
+    Returns:
+        A numpy array of size (NUMFRAMES by numcep) containing features. Each
+        row holds 1 feature vector, a numpy vector containing the signal
+        log-energy
+    '''
+
+    feat, energy = fbank_frames(frames, conf, operators)
     feat = numpy.log(feat)
-    feat = dct(feat, type=2, axis=1, norm='ortho')[:, :int(conf['numcep'])]
-    feat = lifter(feat, float(conf['ceplifter']))
+
+    # the DCT matrix is truncated to numcep and includes the lifter
+    feat = numpy.dot(feat, operators['dct'])
     return feat, numpy.log(energy)
 
-def fbank(signal, samplerate, conf):
+def fbank(signal, samplerate, conf, operators=None):
     '''
     Compute fbank features from an audio signal.
 
@@ -83,20 +106,34 @@ def fbank(signal, samplerate, conf):
             N*1 array
         samplerate: the samplerate of the signal we are working with.
         conf: feature configuration
+        operators: the operators computed with get_operators, computed from
+            the configuration if not given
 
     Returns:
         A numpy array of size (NUMFRAMES by nfilt) containing features, a numpy
         vector containing the signal energy
     '''
 
-    highfreq = int(conf['highfreq'])
-    if highfreq < 0:
-        highfreq = samplerate/2
+    if operators is None:
+        operators = get_operators(samplerate, conf)
+
+    return fbank_frames(framing(signal, samplerate, conf), conf, operators)
+
+def fbank_frames(frames, conf, operators):
+    '''
+    Compute fbank features from the frames of an audio signal.
+
+    Args:
+        frames: the preemphasized frames (see framing)
+        conf: feature configuration
+        operators: the operators computed with get_operators
+
+    Returns:
+        A numpy array of size (NUMFRAMES by nfilt) containing features, a numpy
+        vector containing the signal energy
+    '''
 
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
-    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate)
-    pspec = sigproc.powspec(frames, int(conf['nfft']))
+    pspec = sigproc.powspec(frames, int(conf['nfft']), get_dtype(conf))
 
     # this stores the total energy in each frame
     energy = numpy.sum(pspec, 1)
@@ -104,18 +141,15 @@ def fbank(signal, samplerate, conf):
     # if energy is zero, we get problems with log
     energy = numpy.where(energy == 0, numpy.finfo(float).eps, energy)
 
-    filterbank = get_filterbanks(int(conf['nfilt']), int(conf['nfft']),
-                                 samplerate, int(conf['lowfreq']), highfreq)
-
     # compute the filterbank energies
-    feat = numpy.dot(pspec, filterbank.T)
+    feat = numpy.dot(pspec, operators['filterbank'].T)
 
     # if feat is zero, we get problems with log
     feat = numpy.where(feat == 0, numpy.finfo(float).eps, feat)
 
     return feat, energy
 
-def logfbank(signal, samplerate, conf):
+def logfbank(signal, samplerate, conf, operators=None):
     '''
     Compute log-fbank features from an audio signal.
 
@@ -124,15 +158,51 @@ def logfbank(signal, samplerate, conf):
             N*1 array
         samplerate: the samplerate of the signal we are working with.
         conf: feature configuration
+        operators: the operators computed with get_operators, computed from
+            the configuration if not given
+
+    Returns:
+        A numpy array of size (NUMFRAMES by nfilt) containing features, a numpy
+        vector containing the signal log-energy
+    '''
+    feat, energy = fbank(signal, samplerate, conf, operators)
+    return numpy.log(feat), numpy.log(energy)
+
+def logfbank_frames(frames, conf, operators):
+    '''
+    Compute log-fbank features from the frames of an audio signal.
+
+    Args:
+        frames: the preemphasized frames (see framing)
+        conf: feature configuration
+        operators: the operators computed with get_operators
 
     Returns:
         A numpy array of size (NUMFRAMES by nfilt) containing features, a numpy
         vector containing the signal log-energy
     '''
-    feat, energy = fbank(signal, samplerate, conf)
+    feat, energy = fbank_frames(frames, conf, operators)
     return numpy.log(feat), numpy.log(energy)
 
-def ssc(signal, samplerate, conf):
+def framing(signal, samplerate, conf):
+    '''
+    Preemphasize an audio signal and divide it into frames.
+
+    Args:
+        signal: the audio signal. Should be an N*1 array
+        samplerate: the samplerate of the signal we are working with.
+        conf: feature configuration
+
+    Returns:
+        an array of frames. Size is NUMFRAMES by the window length in samples.
+    '''
+
+    dtype = get_dtype(conf)
+    signal = sigproc.preemphasis(signal, float(conf['preemph']), dtype)
+    return sigproc.framesig(signal, float(conf['winlen'])*samplerate,
+                            float(conf['winstep'])*samplerate, dtype=dtype)
+
+def ssc(signal, samplerate, conf, operators=None):
     '''
     Compute ssc features from an audio signal.
 
@@ -141,19 +211,19 @@ def ssc(signal, samplerate, conf):
             N*1 array
         samplerate: the samplerate of the signal we are working with.
         conf: feature configuration
+        operators: the operators computed with get_operators, computed from
+            the configuration if not given
 
     Returns:
         A numpy array of size (NUMFRAMES by nfilt) containing features, a numpy
         vector containing the signal log-energy
     '''
 
-    highfreq = int(conf['highfreq'])
-    if highfreq < 0:
-        highfreq = samplerate/2
-    signal = sigproc.preemphasis(signal, float(conf['preemph']))
-    frames = sigproc.framesig(signal, float(conf['winlen'])*samplerate,
-                              float(conf['winstep'])*samplerate)
-    pspec = sigproc.powspec(frames, int(conf['nfft']))
+    if operators is None:
+        operators = get_operators(samplerate, conf)
+
+    frames = framing(signal, samplerate, conf)
+    pspec = sigproc.powspec(frames, int(conf['nfft']), get_dtype(conf))
 
     # this stores the total energy in each frame
     energy = numpy.sum(pspec, 1)
@@ -161,15 +231,67 @@ def ssc(signal, samplerate, conf):
     # if energy is zero, we get problems with log
     energy = numpy.where(energy == 0, numpy.finfo(float).eps, energy)
 
-    filterbank = get_filterbanks(int(conf['nfilt']), int(conf['nfft']),
-                                 samplerate, int(conf['lowfreq']), highfreq)
-
     # compute the filterbank energies
+    filterbank = operators['filterbank']
     feat = numpy.dot(pspec, filterbank.T)
-    tiles = numpy.tile(numpy.linspace(1, samplerate/2, numpy.size(pspec, 1)),
-                       (numpy.size(pspec, 0), 1))
 
-    return numpy.dot(pspec*tiles, filterbank.T) / feat, numpy.log(energy)
+    return (numpy.dot(pspec*operators['freqs'], filterbank.T) / feat,
+            numpy.log(energy))
+
+def get_operators(samplerate, conf):
+    '''
+    Compute the operators that only depend on the feature configuration and
+    the samplerate so they can be reused for all utterances
+
+    Args:
+        samplerate: the samplerate of the signal we are working with.
+        conf: feature configuration
+
+    Returns:
+        A dictionary containing:
+            - filterbank: the filterbank (see get_filterbanks)
+            - freqs: the frequencies of the fft bins used for ssc
+            - dct: the DCT matrix truncated to numcep coefficients with the
+                lifter applied, a numpy array of size nfilt * numcep. None if
+                numcep is not in the configuration.
+    '''
+
+    dtype = get_dtype(conf)
+    nfilt = int(conf['nfilt'])
+    nfft = int(conf['nfft'])
+
+    highfreq = int(conf['highfreq'])
+    if highfreq < 0:
+        highfreq = samplerate/2
+
+    operators = dict()
+    operators['filterbank'] = get_filterbanks(
+        nfilt, nfft, samplerate, int(conf['lowfreq']), highfreq).astype(dtype)
+    operators['freqs'] = numpy.linspace(1, samplerate/2, nfft//2+1).astype(
+        dtype)
+
+    if 'numcep' in conf:
+        numcep = int(conf['numcep'])
+        dctmat = dct(numpy.eye(nfilt), type=2, axis=1, norm='ortho')
+        lift = get_lifter(numcep, float(conf['ceplifter']))
+        operators['dct'] = (dctmat[:, :numcep]*lift).astype(dtype)
+    else:
+        operators['dct'] = None
+
+    return operators
+
+def get_dtype(conf):
+    '''
+    get the floating point type used in the feature computation
+
+    Args:
+        conf: feature configuration
+
+    Returns:
+        the numpy dtype, float64 if it is not set in the configuration
+    '''
+
+    return numpy.dtype(conf.get('dtype', 'float64'))
 
 def hz2mel(rate):
     '''
@@ -232,12 +354,21 @@ def get_filterbanks(nfilt=20, nfft=512, samplerate=16000, lowfreq=0,
     #  from Hz to fft bin number
     bins = numpy.floor((nfft+1)*mel2hz(melpoints)/samplerate)
 
-    fbanks = numpy.zeros([nfilt, nfft/2+1])
-    for j in xrange(0, nfilt):
-        for i in xrange(int(bins[j]), int(bins[j+1])):
-            fbanks[j, i] = (i - bins[j])/(bins[j+1]-bins[j])
-        for i in xrange(int(bins[j+1]), int(bins[j+2])):
-            fbanks[j, i] = (bins[j+2]-i)/(bins[j+2]-bins[j+1])
+    # the rising and falling edges of the triangular filters, a bin i belongs
+    # to the rising edge of filter j if bins[j] <= i < bins[j+1] and to the
+    # falling edge if bins[j+1] <= i < bins[j+2]
+    fftbins = numpy.arange(nfft//2+1)
+    left = bins[:-2, numpy.newaxis]
+    center = bins[1:-1, numpy.newaxis]
+    right = bins[2:, numpy.newaxis]
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        rising = (fftbins - left)/(center - left)
+        falling = (right - fftbins)/(right - center)
+
+    fbanks = numpy.where(
+        (fftbins >= left) & (fftbins < center), rising,
+        numpy.where((fftbins >= center) & (fftbins < right), falling, 0))
+
     return fbanks
 
 def lifter(cepstra, liftering=22):
@@ -257,13 +388,30 @@ def lifter(cepstra, liftering=22):
     '''
     if liftering > 0:
         _, ncoeff = numpy.shape(cepstra)
-        lift = 1+(liftering/2)*numpy.sin(numpy.pi
-                                         *numpy.arange(ncoeff)/liftering)
-        return lift*cepstra
+        lift = get_lifter(ncoeff, liftering)
+        return lift.astype(cepstra.dtype)*cepstra
     else:
         # values of liftering <= 0, do nothing
         return cepstra
 
+def get_lifter(ncoeff, liftering=22):
+    '''
+    Compute the cepstral lifter.
+
+    Args:
+        ncoeff: the number of cepstral coefficients
+        liftering: the liftering coefficient to use. Default is 22. L <= 0
+            disables lifter.
+
+    Returns:
+        the lifter as a numpy vector of size ncoeff
+    '''
+    if liftering > 0:
+        return 1+(liftering/2)*numpy.sin(numpy.pi
+                                         *numpy.arange(ncoeff)/liftering)
+    else:
+        return numpy.ones(ncoeff)
+
 def deriv(features):
     '''
     Compute the first order derivative of the features
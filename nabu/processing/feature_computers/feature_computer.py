@@ -2,6 +2,9 @@
 contains the FeatureComputer class'''
 
 from abc import ABCMeta, abstractmethod
+import numpy as np
+import base
+from sigproc import snip
 
 class FeatureComputer(object):
     '''A featurecomputer is used to compute features'''
@@ -18,6 +21,10 @@ class FeatureComputer(object):
 
         self.conf = dict(conf.items('feature'))
 
+        #the precomputed operators (filterbank, DCT ...) for every
+        #configuration they were requested for
+        self.operators = dict()
+
     def __call__(self, sig, rate):
         '''
         compute the features
@@ -34,7 +41,6 @@ class FeatureComputer(object):
 
         return feat
 
-    @abstractmethod
     def comp_feat(self, sig, rate):
         '''
         compute the features
@@ -47,6 +53,115 @@ class FeatureComputer(object):
             the features as a [seq_length x feature_dim] numpy array
         '''
 
+        #snip the edges
+        sig = snip(sig, rate, float(self.conf['winlen']),
+                   float(self.conf['winstep']))
+
+        #preemphasize the signal and divide it into frames
+        frames = base.framing(sig, rate, self.conf)
+
+        return self.dynamic(self.comp_static(frames, rate))
+
+    def comp_feat_batch(self, sigs, rate, block_size=256):
+        '''
+        compute the features for a batch of signals, the frames of all signals
+        are put in one contiguous matrix and the static features are computed
+        for blocks of frames that span multiple signals, which avoids the
+        overhead of many small FFTs and matrix multiplications for short
+        signals. The blocks are kept small so the intermediate results fit in
+        the cache.
+
+        Args:
+            sigs: the audio signals as a list of 1-D numpy arrays
+            rate: the sampling rate of all signals
+            block_size: the number of frames in a block, None to compute all
+                frames at once
+
+        Returns:
+            the features of every signal as a list of
+            [seq_length x feature_dim] numpy arrays
+        '''
+
+        if not sigs:
+            return []
+
+        #snip the edges and divide the signals into frames
+        frames = []
+        for sig in sigs:
+            sig = snip(sig, rate, float(self.conf['winlen']),
+                       float(self.conf['winstep']))
+            frames.append(base.framing(sig, rate, self.conf))
+
+        #the boundaries of the signals in the frames of all signals
+        boundaries = np.cumsum([f.shape[0] for f in frames])[:-1]
+
+        #compute the static features of the frames of all signals per block
+        frames = np.concatenate(frames)
+        block_size = block_size or frames.shape[0]
+        static = np.concatenate([
+            self.comp_static(frames[i:i+block_size], rate)
+            for i in range(0, frames.shape[0], block_size)])
+
+        #split the static features per signal
+
+        return [self.dynamic(feat) for feat in np.split(static, boundaries)]
+
+    def dynamic(self, feat):
+        '''
+        add the dynamic information to the static features
+
+        Args:
+            feat: the static features as a [seq_length x static_dim] numpy
+                array
+
+        Returns:
+            the features as a [seq_length x feature_dim] numpy array
+        '''
+
+        if self.conf['dynamic'] == 'delta':
+            feat = base.delta(feat)
+        elif self.conf['dynamic'] == 'ddelta':
+            feat = base.ddelta(feat)
+        elif self.conf['dynamic'] != 'nodelta':
+            raise Exception('unknown dynamic type')
+
+        return feat
+
+    def get_operators(self, rate):
+        '''
+        get the precomputed operators, they are only computed the first time
+        they are requested for a configuration
+
+        Args:
+            rate: the sampling rate
+
+        Returns:
+            the operators as a dictionary (see base.get_operators)
+        '''
+
+        key = (self.conf.get('nfilt'), self.conf.get('nfft'), rate,
+               self.conf.get('lowfreq'), self.conf.get('highfreq'),
+               self.conf.get('numcep'), self.conf.get('ceplifter'))
+
+        if key not in self.operators:
+            self.operators[key] = base.get_operators(rate, self.conf)
+
+        return self.operators[key]
+
+    @abstractmethod
+    def comp_static(self, frames, rate):
+        '''
+        compute the static features (without dynamic information)
+
+        Args:
+            frames: the preemphasized frames of the audio signal as a
+                [seq_length x window_length] numpy array
+            rate: the sampling rate
+
+        Returns:
+            the features as a [seq_length x static_dim] numpy array
+        '''
+
     @abstractmethod
     def get_dim(self):
         '''the feature dimemsion'''
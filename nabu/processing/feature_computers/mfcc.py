@@ -4,39 +4,29 @@ contains the fbank feature computer'''
 import numpy as np
 import base
 import feature_computer
-from sigproc import snip
 
 class Mfcc(feature_computer.FeatureComputer):
     '''the feature computer class to compute MFCC features'''
 
-    def comp_feat(self, sig, rate):
+    def comp_static(self, frames, rate):
         '''
-        compute the features
+        compute the static features (without dynamic information)
 
         Args:
-            sig: the audio signal as a 1-D numpy array
+            frames: the preemphasized frames of the audio signal as a
+                [seq_length x window_length] numpy array
             rate: the sampling rate
 
         Returns:
-            the features as a [seq_length x feature_dim] numpy array
+            the features as a [seq_length x static_dim] numpy array
         '''
 
-        #snip the edges
-        sig = snip(sig, rate, float(self.conf['winlen']),
-                   float(self.conf['winstep']))
-
-        feat, energy = base.mfcc(sig, rate, self.conf)
+        feat, energy = base.mfcc_frames(frames, self.conf,
+                                        self.get_operators(rate))
 
         if self.conf['include_energy'] == 'True':
             feat = np.append(feat, energy[:, np.newaxis], 1)
 
-        if self.conf['dynamic'] == 'delta':
-            feat = base.delta(feat)
-        elif self.conf['dynamic'] == 'ddelta':
-            feat = base.ddelta(feat)
-        elif self.conf['dynamic'] != 'nodelta':
-            raise Exception('unknown dynamic type')
-
         return feat
 
     def get_dim(self):
@@ -0,0 +1,273 @@
+'''@file online_feature_computer.py
+contains the OnlineFeatureComputer class'''
+
+import math
+import numpy as np
+import base
+import sigproc
+
+#the minimal variance used in the mean and variance normalization
+VARIANCE_FLOOR = 1e-10
+
+class OnlineFeatureComputer(object):
+    '''computes features from an audio stream that is given in blocks
+
+    The samples that do not fill a complete frame and the frames needed as
+    context for the dynamic features are kept between blocks. Without mean and
+    variance normalization the features are the same (up to rounding) as the
+    features the feature computer computes for the complete signal, if the
+    window length and step are a whole number of samples.'''
+
+    def __init__(self, computer, rate, cmvn='none', cmvn_window=300):
+        '''
+        OnlineFeatureComputer constructor
+
+        Args:
+            computer: the FeatureComputer that is used to compute the features
+            rate: the sampling rate of the stream
+            cmvn: the mean and variance normalization, one of none, running
+                (with the statistics of all frames up to the current frame)
+                or window (with the statistics of the last cmvn_window frames)
+            cmvn_window: the number of frames used in window normalization
+        '''
+
+        if cmvn not in ['none', 'running', 'window']:
+            raise Exception('unknown cmvn type: %s' % cmvn)
+
+        self.computer = computer
+        self.rate = rate
+        self.cmvn = cmvn
+        self.cmvn_window = int(cmvn_window)
+
+        conf = computer.conf
+        self.winlen = float(conf['winlen'])
+        self.winstep = float(conf['winstep'])
+        self.frame_len = int(round(self.winlen*rate))
+        self.frame_step = int(round(self.winstep*rate))
+        self.preemph = float(conf['preemph'])
+        self.dtype = base.get_dtype(conf)
+        self.dim = computer.get_dim()
+
+        #the number of static frames before and after a frame that are needed
+        #to compute its dynamic features
+        if conf['dynamic'] == 'nodelta':
+            self.context = 0
+        elif conf['dynamic'] == 'delta':
+            self.context = 2
+        elif conf['dynamic'] == 'ddelta':
+            self.context = 4
+        else:
+            raise Exception('unknown dynamic type')
+
+        #the state of the stream, set by reset
+        self.numsamples = None
+        self.last_sample = None
+        self.samples = None
+        self.numframes = None
+        self.static = None
+        self.static_start = None
+        self.numoutputs = None
+        self.count = None
+        self.sum = None
+        self.sqsum = None
+        self.history = None
+
+        self.reset()
+
+    def reset(self):
+        '''start a new stream'''
+
+        #the number of samples in the stream so far
+        self.numsamples = 0
+
+        #the last sample of the previous block, used for the preemphasis
+        self.last_sample = None
+
+        #the preemphasized samples that have not been divided in frames
+        self.samples = np.zeros([0], dtype=self.dtype)
+
+        #the number of frames that have been computed
+        self.numframes = 0
+
+        #the static features that are kept as context and the index of the
+        #first one in the stream
+        self.static = None
+        self.static_start = 0
+
+        #the number of features that have been returned
+        self.numoutputs = 0
+
+        #the normalization statistics
+        self.count = 0
+        self.sum = np.zeros([self.dim])
+        self.sqsum = np.zeros([self.dim])
+        self.history = np.zeros([0, self.dim])
+
+    def __call__(self, block):
+        '''
+        compute the features for a block of audio
+
+        Args:
+            block: the audio samples as a 1-D numpy array
+
+        Returns:
+            the features of the frames that can be computed with the samples
+            received so far as a [num_frames x feature_dim] numpy array
+        '''
+
+        block = np.asarray(block)
+        if block.size == 0:
+            return np.zeros([0, self.dim], dtype=self.dtype)
+
+        self.numsamples += block.size
+
+        #preemphasize the block, the preemphasis of the first sample depends
+        #on the last sample of the previous block
+        if self.last_sample is None:
+            filtered = sigproc.preemphasis(block, self.preemph, self.dtype)
+        else:
+            filtered = sigproc.preemphasis(
+                np.concatenate([self.last_sample, block]), self.preemph,
+                self.dtype)[1:]
+        self.last_sample = block[-1:]
+        self.samples = np.concatenate([self.samples, filtered])
+
+        #divide the samples into complete frames
+        if self.samples.size < self.frame_len:
+            numframes = 0
+        else:
+            numframes = (
+                (self.samples.size - self.frame_len)//self.frame_step + 1)
+
+        return self._features(numframes, False)
+
+    def flush(self):
+        '''
+        compute the remaining features at the end of the stream and start a
+        new stream
+
+        Returns:
+            the remaining features as a [num_frames x feature_dim] numpy array
+        '''
+
+        if self.numsamples == 0:
+            return np.zeros([0, self.dim], dtype=self.dtype)
+
+        #determine the number of frames the feature computer would compute
+        #for the complete signal (see sigproc.snip and sigproc.framesig)
+        numframes = int((self.numsamples - self.winlen*self.rate)/
+                        (self.winstep*self.rate))
+        sniplen = int(numframes*self.winstep*self.rate + self.winlen*self.rate)
+        if sniplen <= self.frame_len:
+            numframes = 1
+        else:
+            numframes = 1 + int(math.ceil(
+                (1.0*sniplen - self.frame_len)/self.frame_step))
+
+        #the last frame can be padded with zeros
+        self.samples = self.samples[:sniplen - self.numframes*self.frame_step]
+
+        features = self._features(max(numframes - self.numframes, 0), True)
+
+        self.reset()
+
+        return features
+
+    def _features(self, numframes, final):
+        '''
+        compute the features for the next frames in the samples
+
+        Args:
+            numframes: the number of frames to compute
+            final: True if the stream ends after these frames
+
+        Returns:
+            the features that can be computed as a
+            [num_frames x feature_dim] numpy array
+        '''
+
+        if numframes > 0:
+            frames = sigproc.framesig(
+                self.samples[:(numframes-1)*self.frame_step + self.frame_len],
+                self.frame_len, self.frame_step, dtype=self.dtype)
+            self.samples = self.samples[numframes*self.frame_step:]
+            self.numframes += numframes
+
+            static = self.computer.comp_static(frames, self.rate)
+            if self.static is None:
+                self.static = static
+            else:
+                self.static = np.concatenate([self.static, static])
+
+        if self.static is None:
+            return np.zeros([0, self.dim], dtype=self.dtype)
+
+        #the dynamic features of the last frames depend on frames that have
+        #not been computed yet, unless the stream ends
+        end = self.static_start + self.static.shape[0]
+        if not final:
+            end -= self.context
+        if end <= self.numoutputs:
+            return np.zeros([0, self.dim], dtype=self.dtype)
+
+        features = self.computer.dynamic(self.static)[
+            self.numoutputs - self.static_start:end - self.static_start]
+        self.numoutputs = end
+
+        #only keep the context that is needed for the next frames
+        start = max(self.numoutputs - self.context, 0)
+        self.static = self.static[start - self.static_start:]
+        self.static_start = start
+
+        return self._normalize(features)
+
+    def _normalize(self, features):
+        '''
+        mean and variance normalize the features
+
+        Args:
+            features: the features as a [num_frames x feature_dim] numpy array
+
+        Returns:
+            the normalized features
+        '''
+
+        if self.cmvn == 'none':
+            return features
+
+        values = features.astype(np.float64)
+
+        if self.cmvn == 'running':
+
+            counts = self.count + np.arange(1, values.shape[0] + 1)
+            sums = self.sum + np.cumsum(values, 0)
+            sqsums = self.sqsum + np.cumsum(np.square(values), 0)
+
+            self.count = counts[-1]
+            self.sum = sums[-1]
+            self.sqsum = sqsums[-1]
+
+        else:
+
+            #compute the statistics of the window ending at every frame with
+            #the cumulative sums of the previous frames and the new frames
+            extended = np.concatenate([self.history, values])
+            csum = np.concatenate(
+                [np.zeros([1, self.dim]), np.cumsum(extended, 0)])
+            csqsum = np.concatenate(
+                [np.zeros([1, self.dim]), np.cumsum(np.square(extended), 0)])
+            stop = np.arange(self.history.shape[0] + 1, extended.shape[0] + 1)
+            begin = np.maximum(stop - self.cmvn_window, 0)
+
+            counts = stop - begin
+            sums = csum[stop] - csum[begin]
+            sqsums = csqsum[stop] - csqsum[begin]
+
+            self.history = extended[
+                max(extended.shape[0] - self.cmvn_window + 1, 0):]
+
+        mean = sums/counts[:, np.newaxis]
+        variance = sqsums/counts[:, np.newaxis] - np.square(mean)
+        std = np.sqrt(np.maximum(variance, VARIANCE_FLOOR))
+
+        return ((values - mean)/std).astype(features.dtype)
@@ -29,11 +29,17 @@ Author: James Lyons 2012
 
 import math
 import numpy
+from numpy.lib.stride_tricks import as_strided
+from scipy import fftpack
 
-def framesig(sig, frame_len, frame_step, winfunc=lambda x: numpy.ones((x, ))):
+def framesig(sig, frame_len, frame_step, winfunc=None,
+             dtype=numpy.float64):
     '''
     Frame a signal into overlapping frames.
 
+    The frames are a strided view on the (padded) signal, so no data is copied
+    unless a window is applied.
+
     Args:
         sig: the audio signal to frame.
         frame_len: length of each frame measured in samples.
@@ -41,6 +47,7 @@ def framesig(sig, frame_len, frame_step, winfunc=lambda x: numpy.ones((x, ))):
             the next frame should begin.
         winfunc: the analysis window to apply to each frame. By default no
             window is applied.
+        dtype: the floating point type of the frames
 
     Returns:
         an array of frames. Size is NUMFRAMES by frame_len.
@@ -56,16 +63,20 @@ def framesig(sig, frame_len, frame_step, winfunc=lambda x: numpy.ones((x, ))):
 
     padlen = int((numframes-1)*frame_step + frame_len)
 
-    zeros = numpy.zeros((padlen - slen,))
-    padsignal = numpy.concatenate((sig, zeros))
+    if padlen == slen:
+        padsignal = numpy.ascontiguousarray(sig, dtype=dtype)
+    else:
+        padsignal = numpy.zeros((padlen,), dtype=dtype)
+        padsignal[:slen] = sig
 
-    indices = (numpy.tile(numpy.arange(0, frame_len), (numframes, 1))
-               + numpy.tile(numpy.arange(0, numframes*frame_step, frame_step),
-                            (frame_len, 1)).T)
-    indices = numpy.array(indices, dtype=numpy.int32)
-    frames = padsignal[indices]
-    win = numpy.tile(winfunc(frame_len), (numframes, 1))
-    return frames*win
+    stride = padsignal.strides[0]
+    frames = as_strided(padsignal, shape=(numframes, frame_len),
+                        strides=(frame_step*stride, stride))
+
+    if winfunc is None:
+        return frames
+    else:
+        return frames*winfunc(frame_len).astype(dtype)
 
 def deframesig(frames, siglen, frame_len, frame_step,
                winfunc=lambda x: numpy.ones((x, ))):
@@ -116,7 +127,7 @@ def deframesig(frames, siglen, frame_len, frame_step,
     rec_signal = rec_signal/window_correction
     return rec_signal[0:siglen]
 
-def magspec(frames, nfft):
+def magspec(frames, nfft, dtype=numpy.float64):
     '''
     Compute the magnitude spectrum of each frame in frames.
 
@@ -126,16 +137,16 @@ def magspec(frames, nfft):
         frames: the array of frames. Each row is a frame.
         nfft: the FFT length to use. If NFFT > frame_len, the frames are
             zero-padded.
+        dtype: the floating point type of the spectrum
 
     Returns:
         If frames is an NxD matrix, output will be NxNFFT. Each row will be the
         magnitude spectrum of the corresponding frame.
     '''
 
-    complex_spec = numpy.fft.rfft(frames, nfft)
-    return numpy.absolute(complex_spec)
+    return numpy.sqrt(sqmagspec(frames, nfft, dtype))
 
-def powspec(frames, nfft):
+def powspec(frames, nfft, dtype=numpy.float64):
     '''
     Compute the power spectrum of each frame in frames.
 
@@ -145,12 +156,55 @@ def powspec(frames, nfft):
         frames: the array of frames. Each row is a frame.
         nfft: the FFT length to use. If NFFT > frame_len, the frames are
             zero-padded.
+        dtype: the floating point type of the spectrum
 
     Returns:
         If frames is an NxD matrix, output will be NxNFFT. Each row will be the
         power spectrum of the corresponding frame.
     '''
-    return 1.0/nfft * numpy.square(magspec(frames, nfft))
+
+    pspec = sqmagspec(frames, nfft, dtype)
+    pspec *= 1.0/nfft
+
+    return pspec
+
+def sqmagspec(frames, nfft, dtype=numpy.float64):
+    '''
+    Compute the squared magnitude spectrum of each frame in frames.
+
+    In single precision the FFT is computed with the real FFT of scipy, which
+    keeps the computation in float32.
+
+    Args:
+        frames: the array of frames. Each row is a frame.
+        nfft: the FFT length to use. If NFFT > frame_len, the frames are
+            zero-padded.
+        dtype: the floating point type of the spectrum
+
+    Returns:
+        If frames is an NxD matrix, output will be Nx(NFFT/2+1). Each row will
+        be the squared magnitude spectrum of the corresponding frame.
+    '''
+
+    if numpy.dtype(dtype) != numpy.float32:
+        complex_spec = numpy.fft.rfft(frames, nfft)
+        return numpy.square(complex_spec.real) + numpy.square(complex_spec.imag)
+
+    #the packed spectrum contains the real part of the first bin followed by
+    #the interleaved real and imaginary parts of the other bins, the last bin
+    #only has a real part if nfft is even
+    packed = fftpack.rfft(numpy.asarray(frames, dtype=numpy.float32), nfft)
+    sqmag = numpy.empty([packed.shape[0], nfft//2+1], dtype=numpy.float32)
+    sqmag[:, 0] = numpy.square(packed[:, 0])
+    if nfft % 2 == 0:
+        sqmag[:, 1:-1] = (numpy.square(packed[:, 1:-1:2])
+                          + numpy.square(packed[:, 2:-1:2]))
+        sqmag[:, -1] = numpy.square(packed[:, -1])
+    else:
+        sqmag[:, 1:] = (numpy.square(packed[:, 1::2])
+                        + numpy.square(packed[:, 2::2]))
+
+    return sqmag
 
 def logpowspec(frames, nfft, norm=1):
     '''
@@ -177,18 +231,50 @@ def logpowspec(frames, nfft, norm=1):
     else:
         return lps
 
-def preemphasis(signal, coeff=0.95):
+def preemphasis(signal, coeff=0.95, dtype=numpy.float64):
     '''
     perform preemphasis on the input signal.
 
     Args:
         signal: The signal to filter.
         coeff: The preemphasis coefficient. 0 is no filter, default is 0.95.
+        dtype: the floating point type of the filtered signal
 
     Returns:
         the filtered signal.
     '''
-    return numpy.append(signal[0], signal[1:]-coeff*signal[:-1])
+
+    signal = numpy.asarray(signal, dtype=dtype)
+    filtered = numpy.empty_like(signal)
+    filtered[:1] = signal[:1]
+    numpy.subtract(signal[1:], coeff*signal[:-1], out=filtered[1:])
+
+    return filtered
+
+def numframes(siglen, rate, winlen, winstep):
+    '''
+    compute the number of frames the feature computers compute for a signal,
+    the signal is snipped and framed (see snip and framesig)
+
+    Args:
+        siglen: the number of samples in the signal
+        rate: sampling rate
+        winlen: length of the sliding window [s]
+        winstep: stepsize of the sliding window [s]
+
+    Returns:
+        the number of frames
+    '''
+
+    snipped = int((siglen-winlen*rate)/(winstep*rate))
+    sniplen = min(siglen, int(snipped*winstep*rate + winlen*rate))
+    frame_len = int(round(winlen*rate))
+    frame_step = int(round(winstep*rate))
+
+    if sniplen <= frame_len:
+        return 1
+    else:
+        return 1 + int(math.ceil((1.0*sniplen - frame_len)/frame_step))
 
 def snip(sig, rate, winlen, winstep):
     '''
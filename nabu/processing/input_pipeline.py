@@ -2,19 +2,24 @@
 contains the methotology for creating the input pipeline'''
 
 from __future__ import division
-import os
 import numpy as np
 import tensorflow as tf
 from tfreaders import tfreader_factory
+import pointer_index
 
 def get_filenames(dataconfs):
-    '''create a list of filenames to put into the queue
+    '''create a list of pointers to put into the queue
+
+    The pointer indices of the data directories (see pointer_index) are joined
+    on the names with a sorted merge, examples that are not in all sets of data
+    are ignored.
 
     Args:
         dataconfs: the database configurations as a list of lists
 
     Returns:
-        - a list containing all the filenames
+        - a list containing the tab seperated pointers of all examples, a
+            pointer points to a record in the form shard:offset
         - a list containing the names
     '''
 
@@ -22,35 +27,33 @@ def get_filenames(dataconfs):
     #one queue element is a space seperated list of all data elements for
     #one example
 
-    #read all the names and files
-    files = []
-    for dataconfset in dataconfs:
-        setfiles = dict()
-        for i, dataconf in enumerate(dataconfset):
-            with open(os.path.join(dataconf['dir'], 'pointers.scp')) as fid:
-                for line in fid:
-                    (n, f) = line.strip().split('\t')
-                    setfiles['%s-%d' % (n, i)] = f
-        files.append(setfiles)
-
-    #loop over the first names and look for them in the other names. If not
-    #all sets contain the name, ignore it
+    #the i-th directory of every set is joined with the i-th directory of the
+    #other sets, the names get the index of their directory
     data_queue_elements = []
     names = []
-    for name in files[0]:
-        allfound = True
-        for setfile in files:
-            if name not in setfile:
-                print('%s was not found in all sets of data, ignoring this'
-                      ' example' % name)
-                allfound = False
-                break
-        if allfound:
-            data_queue_element = files[0][name]
-            for setfile in files[1:]:
-                data_queue_element += '\t' + setfile[name]
-            data_queue_elements.append(data_queue_element)
-            names.append(name)
+    for i in range(max(len(dataconfset) for dataconfset in dataconfs)):
+        dirs = [dataconfset[i]['dir'] if i < len(dataconfset) else None
+                for dataconfset in dataconfs]
+        if dirs[0] is None:
+            continue
+
+        indices = [pointer_index.read_index(d) for d in dirs if d is not None]
+        if len(indices) < len(dirs):
+            joined, pointers = indices[0][0][:0], []
+            missing = [indices[0][0].size]
+        else:
+            joined, pointers, missing = pointer_index.join(indices)
+
+        if any(missing):
+            print ('%d examples in %s were not found in all sets of data, '
+                   'ignoring these examples' % (missing[0], dirs[0]))
+            for d, m in zip(dirs[1:], missing[1:]):
+                if m:
+                    print '%d examples in %s are not used' % (m, d)
+
+        data_queue_elements += [
+            '\t'.join(p) for p in zip(*[a.tolist() for a in pointers])]
+        names += ['%s-%d' % (name, i) for name in joined.tolist()]
 
     return data_queue_elements, names
 
@@ -61,6 +64,9 @@ def input_pipeline(
     dataconfs,
     variable_batch_size=False,
     allow_smaller_final_batch=False,
+    batched_reads=False,
+    batch_frames=None,
+    cache=None,
     name=None):
     '''create the input pipeline
 
@@ -74,6 +80,15 @@ def input_pipeline(
             for buckets with higher seq_length a smaller batch size is used
         allow_smaller_final_batch: if set to True a smaller final batch is
             allowed
+        batched_reads: if set to True and there is a single bucket the
+            examples of a batch are dequeued, read and padded together
+        batch_frames: the maximal number of padded frames in a batch, the
+            sum of the padded lengths of all data elements, if given the
+            batch size of every bucket is derived from it instead of from
+            batch_size
+        cache: a CorpusCache the decoded examples are kept in so they are
+            only read in the first epoch, None to read the examples every
+            epoch
         name: name of the pipeline
 
     Returns:
@@ -83,6 +98,35 @@ def input_pipeline(
 
     with tf.variable_scope(name or 'input_pipeline'):
 
+        if batched_reads and numbuckets == 1:
+
+            readers = _create_readers(dataconfs, cache)
+            _, batch_sizes, num_steps = _batch_sizes(
+                [r.metadata['sequence_length_histogram'] for r in readers],
+                batch_size, numbuckets, variable_batch_size, batch_frames,
+                [r.padded_length() for r in readers])
+
+            #dequeue the elements of a batch at once
+            with tf.name_scope('split_queue'):
+                if allow_smaller_final_batch:
+                    elements = data_queue.dequeue_up_to(batch_sizes)
+                else:
+                    elements = data_queue.dequeue_many(batch_sizes)
+
+            with tf.variable_scope('read_data'):
+                data = _read_batch(elements, readers)
+
+            #the read batches are prefetched in a queue
+            batches = tf.train.batch(
+                tensors=data,
+                batch_size=batch_sizes,
+                capacity=batch_sizes*2,
+                enqueue_many=True,
+                allow_smaller_final_batch=allow_smaller_final_batch,
+                dynamic_pad=True)
+
+            return batches[::2], batches[1::2], num_steps
+
         #split the an element in the data queue and enqueue them
         #in seperaterately in a different queue
         with tf.name_scope('split_queue'):
@@ -95,8 +139,10 @@ def input_pipeline(
         data = []
 
         with tf.variable_scope('read_data'):
+            readers = _create_readers(dataconfs, cache)
+
             #create a seperate queue for each data element
-            for i, dataconfset in enumerate(dataconfs):
+            for i, reader in enumerate(readers):
                 with tf.variable_scope('reader'):
 
                     queue = tf.FIFOQueue(
@@ -108,47 +154,23 @@ def input_pipeline(
 
                     enqueue_op = queue.enqueue(filenames[i])
 
-                    #create a reader to read from the queue
-                    types = [dataconf['type'] for dataconf in dataconfset]
-                    if len(set(types)) > 1:
-                        raise Exception(
-                            'all data types in a set must be the same')
-                    dirs = [dataconf['dir'] for dataconf in dataconfset]
-                    reader = tfreader_factory.factory(types[0])(dirs)
-
-                    if i == 0:
-                        sequence_length_histogram = \
-                            reader.metadata['sequence_length_histogram']
-
                     #read the data from the data element queue and make sure
                     #they happen in the correct order
                     with tf.control_dependencies([enqueue_op]):
-                        read_data = reader(queue)
+                        if cache is None:
+                            read_data = reader(queue)
+                        else:
+                            read_data = reader.read_cached(queue.dequeue())
                         data += read_data
 
             data = tf.tuple(data)
 
         #create batches of the data
-        if numbuckets > 1:
-            boundaries = bucket_boundaries(sequence_length_histogram,
-                                           numbuckets)
-            if variable_batch_size:
-                batch_sizes = [
-                    max(int(batch_size*boundaries[0]/b), 1)
-                    for b in boundaries + [sequence_length_histogram.size]]
-
-                #compute the number of steps
-                numutt = [
-                    sequence_length_histogram[boundaries[i]:b].sum()
-                    for i, b in enumerate(boundaries[1:])]
-                numutt = (
-                    [sequence_length_histogram[:boundaries[0]].sum()] +
-                    numutt +
-                    [sequence_length_histogram[boundaries[-1]:].sum()])
-                num_steps = int((np.array(numutt)/np.array(batch_sizes)).sum())
-            else:
-                batch_sizes = int(batch_size)
-                num_steps = int(sequence_length_histogram.sum()/batch_sizes)
+        boundaries, batch_sizes, num_steps = _batch_sizes(
+            [r.metadata['sequence_length_histogram'] for r in readers],
+            batch_size, numbuckets, variable_batch_size, batch_frames,
+            [r.padded_length() for r in readers])
+        if boundaries is not None:
             _, batches = tf.contrib.training.bucket_by_sequence_length(
                 input_length=data[1],
                 tensors=data,
@@ -158,11 +180,10 @@ def input_pipeline(
                 dynamic_pad=True
             )
         else:
-            num_steps = int(sequence_length_histogram.sum()/int(batch_size))
             batches = tf.train.batch(
                 tensors=data,
-                batch_size=int(batch_size),
-                capacity=int(batch_size)*2,
+                batch_size=batch_sizes,
+                capacity=batch_sizes*2,
                 allow_smaller_final_batch=allow_smaller_final_batch,
                 dynamic_pad=True)
 
@@ -172,30 +193,419 @@ def input_pipeline(
 
         return data, seq_length, num_steps
 
+def dataset_pipeline(
+    data_queue_elements,
+    batch_size,
+    numbuckets,
+    dataconfs,
+    variable_batch_size=False,
+    allow_smaller_final_batch=False,
+    shuffle=True,
+    num_epochs=None,
+    num_parallel_reads=4,
+    prefetch=2,
+    batched_reads=False,
+    batch_frames=None,
+    cache=None,
+    name=None):
+    '''create the input pipeline with a tf.data dataset instead of queues
+
+    The examples are read and parsed by parallel calls, the batches are
+    created with group_by_window and prefetched. The batches are the same as
+    the batches of input_pipeline.
+
+    Args:
+        data_queue_elements: the tab seperated pointers of all examples (see
+            get_filenames)
+        batch_size: the desired batch size
+        numbuckets: the number of data buckets
+        dataconfs: the databes configuration sections that should be read
+            as a list of lists
+        variable_batch_size: bool, change batch size from bucket to bucket,
+            for buckets with higher seq_length a smaller batch size is used
+        allow_smaller_final_batch: if set to True a smaller final batch is
+            allowed
+        shuffle: if set to True the examples are shuffled every epoch
+        num_epochs: the number of passes over the data, None to repeat the
+            data indefinitely
+        num_parallel_reads: the number of examples that are read in parallel
+        prefetch: the number of batches that are prepared ahead
+        batched_reads: if set to True and there is a single bucket the
+            examples of a batch are read and padded together
+        batch_frames: the maximal number of padded frames in a batch (see
+            input_pipeline)
+        cache: a CorpusCache the decoded examples are kept in (see
+            input_pipeline)
+        name: name of the pipeline
+
+    Returns:
+        - the data elements as a list of [batch_size x ...] tensor
+        - the sequence lengths as a list of [batch_size] tensor
+        - the number of steps in each epoch'''
+
+    with tf.variable_scope(name or 'input_pipeline'):
+
+        readers = _create_readers(dataconfs, cache)
+        boundaries, batch_sizes, num_steps = _batch_sizes(
+            [r.metadata['sequence_length_histogram'] for r in readers],
+            batch_size, numbuckets, variable_batch_size, batch_frames,
+            [r.padded_length() for r in readers])
+
+        dataset = tf.data.Dataset.from_tensor_slices(data_queue_elements)
+        if shuffle:
+            dataset = dataset.shuffle(len(data_queue_elements))
+        dataset = dataset.repeat(num_epochs)
+
+        if batched_reads and numbuckets == 1:
+
+            #batch the elements and read the examples of a batch together
+            dataset = dataset.batch(batch_sizes)
+            if not allow_smaller_final_batch:
+                dataset = dataset.filter(
+                    lambda elements: tf.equal(
+                        tf.shape(elements)[0], batch_sizes))
+            dataset = dataset.map(
+                lambda elements: tuple(_read_batch(elements, readers)),
+                num_parallel_calls=num_parallel_reads)
+
+        else:
+
+            def read(element):
+                '''read the data of all readers for an element'''
+
+                pointers = tf.sparse_tensor_to_dense(
+                    tf.string_split([element], '\t'), '')
+                pointers = tf.unstack(tf.reshape(pointers, [len(dataconfs)]))
+
+                data = []
+                for reader, pointer in zip(readers, pointers):
+                    with tf.variable_scope('reader'):
+                        if cache is None:
+                            data += reader.read_pointer(pointer)
+                        else:
+                            data += reader.read_cached(pointer)
+
+                return tuple(data)
+
+            dataset = dataset.map(read, num_parallel_calls=num_parallel_reads)
+
+            #the windows of group_by_window have no output shapes so the
+            #shapes are taken from the read examples
+            shapes = dataset.output_shapes
+
+            def batch(window, size):
+                '''pad the examples in a window into batches of size
+                examples'''
+
+                batched = window.padded_batch(size, shapes)
+                if not allow_smaller_final_batch:
+                    batched = batched.filter(
+                        lambda *batch: tf.equal(
+                            tf.cast(tf.shape(batch[0])[0], tf.int64), size))
+
+                return batched
+
+            #create batches of the data
+            if boundaries is not None:
+
+                #the bucket of an example is determined by its first sequence
+                #length
+                edges = tf.constant(boundaries, dtype=tf.int32)
+                def bucket(*data):
+                    '''the index of the bucket of an example'''
+                    return tf.reduce_sum(
+                        tf.cast(data[1] >= edges, tf.int64))
+
+                if isinstance(batch_sizes, list):
+                    sizes = tf.constant(batch_sizes, dtype=tf.int64)
+                else:
+                    sizes = tf.constant(
+                        [batch_sizes]*(len(boundaries) + 1), dtype=tf.int64)
+
+                dataset = dataset.apply(tf.contrib.data.group_by_window(
+                    key_func=bucket,
+                    reduce_func=lambda key, window: batch(window, sizes[key]),
+                    window_size_func=lambda key: sizes[key]))
+
+            else:
+                dataset = batch(dataset, tf.constant(batch_sizes, tf.int64))
+
+        dataset = dataset.prefetch(prefetch)
+
+        batches = dataset.make_one_shot_iterator().get_next()
+
+        #without buckets all batches have the same size
+        if boundaries is None and not allow_smaller_final_batch:
+            for tensor in batches:
+                tensor.set_shape([batch_sizes] + tensor.shape.as_list()[1:])
+
+        #seperate the data and the sequence lengths
+        data = list(batches[::2])
+        seq_length = list(batches[1::2])
+
+        return data, seq_length, num_steps
+
+def _read_batch(elements, readers):
+    '''read the data of a batch of elements, every reader reads its
+    examples of the batch together
+
+    Args:
+        elements: a [batch_size] string tensor containing the tab seperated
+            pointers of the examples
+        readers: the readers of the data sets
+
+    Returns:
+        a list containing the data as a [batch_size x ...] tensor and the
+        sequence lengths as a [batch_size] tensor of every reader'''
+
+    pointers = tf.sparse_tensor_to_dense(
+        tf.string_split(elements, '\t'), '')
+    pointers = tf.reshape(pointers, [-1, len(readers)])
+
+    data = []
+    for i, reader in enumerate(readers):
+        with tf.variable_scope('reader'):
+            data += reader.read_batch(pointers[:, i])
+
+    return data
+
+def _create_readers(dataconfs, cache=None):
+    '''create the readers of the data sets
+
+    Args:
+        dataconfs: the databes configuration sections that should be read
+            as a list of lists
+        cache: the CorpusCache of the readers, None for no cache
+
+    Returns:
+        the readers as a list'''
+
+    readers = []
+    for dataconfset in dataconfs:
+        types = [dataconf['type'] for dataconf in dataconfset]
+        if len(set(types)) > 1:
+            raise Exception('all data types in a set must be the same')
+        dirs = [dataconf['dir'] for dataconf in dataconfset]
+        if 'feature_config' in dataconfset[0]:
+            #compute the features with an other configuration
+            readers.append(tfreader_factory.factory(types[0])(
+                dirs, dataconfset[0]['feature_config']))
+        else:
+            readers.append(tfreader_factory.factory(types[0])(dirs))
+        readers[-1].cache = cache
+
+    return readers
+
+def _batch_sizes(histograms, batch_size, numbuckets, variable_batch_size,
+                 batch_frames=None, padded_lengths=None):
+    '''determine the buckets, the batch sizes and the number of steps, the
+    boundaries and the estimated padding overhead are printed
+
+    Args:
+        histograms: the sequence length histograms of the data sets, the
+            first data set determines the buckets
+        batch_size: the desired batch size
+        numbuckets: the number of data buckets
+        variable_batch_size: bool, change batch size from bucket to bucket
+        batch_frames: the maximal number of padded frames in a batch, if
+            given the batch size of every bucket is derived from it
+        padded_lengths: the length the examples of every data set are always
+            padded to, None for the data sets that are padded to the longest
+            sequence in the batch
+
+    Returns:
+        - the bucket boundaries as a list, None if the data is not bucketed
+        - the batch size as an integer or the batch size of every bucket as a
+            list if the data is bucketed and variable_batch_size is True or
+            batch_frames is given
+        - the number of steps in each epoch'''
+
+    histogram = histograms[0]
+
+    boundaries = None
+    if numbuckets > 1:
+        boundaries = bucket_boundaries(histogram, numbuckets) or None
+
+    edges = [0] + (boundaries or []) + [histogram.size]
+
+    if batch_frames is not None:
+        #fill the frame budget with the padded lengths of the longest
+        #examples of every bucket
+        batch_sizes = [
+            max(int(batch_frames//frames), 1)
+            for frames in _bucket_frames(histograms, edges, padded_lengths)]
+        print 'batch sizes for %d frames: %s' % (
+            batch_frames, ' '.join(map(str, batch_sizes)))
+    elif boundaries is not None and variable_batch_size:
+        batch_sizes = [
+            max(int(batch_size*boundaries[0]/b), 1)
+            for b in boundaries + [histogram.size]]
+    else:
+        batch_sizes = [int(batch_size)]*(len(edges) - 1)
+
+    #compute the number of steps
+    numutt = [histogram[first:last].sum()
+              for first, last in zip(edges[:-1], edges[1:])]
+    num_steps = int((np.array(numutt)/np.array(batch_sizes)).sum())
+
+    if boundaries is None or len(set(batch_sizes)) == 1:
+        batch_sizes = batch_sizes[0]
+
+    if boundaries is not None:
+        print 'bucket boundaries: %s' % ' '.join(map(str, boundaries))
+    print 'estimated padding overhead: %.1f%% of the frames' % (
+        100*padding_overhead(histogram, boundaries or [], batch_sizes))
+
+    return boundaries, batch_sizes, num_steps
+
+def _bucket_frames(histograms, edges, padded_lengths=None):
+    '''compute the padded number of frames of the longest example of every
+    bucket
+
+    Only the histograms of the data sets are known, so the length of the
+    other data sets are estimated by assuming that the lengths of an example
+    have the same rank in all data sets. The longest example of a bucket then
+    has the length at the same quantile in every histogram. The data sets
+    that are always padded to the same length count that length in every
+    bucket.
+
+    Args:
+        histograms: the sequence length histograms of the data sets, the
+            first data set determines the buckets
+        edges: the bucket edges of the first data set, bucket i contains the
+            lengths in [edges[i], edges[i+1])
+        padded_lengths: the length the examples of every data set are always
+            padded to, None for the data sets that are padded to the longest
+            sequence in the batch
+
+    Returns:
+        the number of frames of every bucket as a list'''
+
+    #the fraction of the examples up to the end of every bucket
+    cumulative = np.cumsum(histograms[0])
+    quantiles = np.array(
+        [cumulative[last - 1] for last in edges[1:]], dtype=np.float64)
+    quantiles /= max(cumulative[-1], 1)
+
+    if padded_lengths is None:
+        padded_lengths = [None]*len(histograms)
+
+    frames = np.zeros(len(edges) - 1)
+    for histogram, padded_length in zip(histograms, padded_lengths):
+        if padded_length is not None:
+            frames += padded_length
+            continue
+        cumulative = np.cumsum(histogram).astype(np.float64)
+        cumulative /= max(cumulative[-1], 1)
+        frames += np.minimum(
+            np.searchsorted(cumulative, quantiles - 1e-9),
+            histogram.size - 1)
+
+    return frames.tolist()
+
 def bucket_boundaries(histogram, numbuckets):
-    '''detemine the bucket boundaries to uniformally devide the number of
-    elements in the buckets
+    '''determine the bucket boundaries that minimize the padding
 
+    An example is padded at most to the longest sequence in its bucket, so
+    the boundaries minimize the number of frames when every example is padded
+    to the longest sequence in its bucket. The optimal partition of the
+    sequence lengths that occur is found with dynamic programming on the
+    prefix sums of the histogram. The cost of a bucket satisfies the
+    quadrangle inequality, so the optimal split points are monotone and every
+    row of the dynamic programming is computed with divide and conquer.
 
-    this is a greedy algorithm and does not guarantee an optimal solution'''
+    Args:
+        histogram: the sequence length histogram
+        numbuckets: the number of buckets
+
+    Returns:
+        the bucket boundaries as a list, bucket i contains the sequence
+        lengths in [boundaries[i-1], boundaries[i])'''
+
+    #the sequence lengths that occur and the number of examples that are not
+    #longer than each of them
+    lengths = np.nonzero(histogram)[0]
+    counts = np.concatenate([[0], np.cumsum(histogram[lengths])])
+    counts = counts.astype(np.float64)
+
+    if len(lengths) < numbuckets:
+        print '%d buckets could not be reached, using %d buckets' % (
+            numbuckets, len(lengths))
+        numbuckets = len(lengths)
+    if numbuckets < 2:
+        return []
+
+    #the cost of the first i lengths in a single bucket
+    cost = counts*np.concatenate([[0], lengths])
+    cost[0] = np.inf
+
+    #splits[k][i] is the first length of the last bucket when the first i
+    #lengths are divided over k+2 buckets
+    splits = []
+    for k in range(2, numbuckets + 1):
+        previous = cost
+        cost = np.full(len(counts), np.inf)
+        split = np.zeros(len(counts), dtype=np.int64)
+
+        def solve(first, last, lower, upper):
+            '''compute the cost for the lengths first to last knowing that
+            the optimal split points are between lower and upper'''
+
+            if first > last:
+                return
+            i = (first + last)//2
+            candidates = np.arange(lower, min(i - 1, upper) + 1)
+            total = (previous[candidates] +
+                     (counts[i] - counts[candidates])*lengths[i-1])
+            best = np.argmin(total)
+            cost[i] = total[best]
+            split[i] = candidates[best]
+            solve(first, i - 1, lower, split[i])
+            solve(i + 1, last, split[i], upper)
+
+        solve(k, len(lengths), k - 1, len(lengths) - 1)
+        splits.append(split)
+
+    #the boundaries are the lengths after the last length of every bucket
+    boundaries = []
+    i = len(lengths)
+    for split in reversed(splits):
+        i = split[i]
+        boundaries.append(int(lengths[i-1]) + 1)
+
+    return boundaries[::-1]
+
+def padding_overhead(histogram, boundaries, batch_sizes):
+    '''estimate the number of padded frames relative to the number of frames
+    in the data, the examples in a batch are assumed to be drawn at random
+    from their bucket and are padded to the longest sequence in the batch
 
-    boundaries = [0]*(numbuckets)
-    for i in range(numbuckets-1):
-        numelements = int(histogram[boundaries[i]:].sum()/(numbuckets-i))
-        if numelements == 0:
-            print '%d buckets could not be reached, using %d buckets' % (
-                numbuckets, i)
+    Args:
+        histogram: the sequence length histogram
+        boundaries: the bucket boundaries as a list
+        batch_sizes: the batch size as an integer or the batch size of every
+            bucket as a list
+
+    Returns:
+        the number of padded frames divided by the number of frames'''
 
-        #add elements to the bucket to get as close as possible to the desired
-        #number of elements
-        j = boundaries[i] + 1
+    if not isinstance(batch_sizes, list):
+        batch_sizes = [batch_sizes]*(len(boundaries) + 1)
 
-        while (j+1 < len(histogram) and
-               abs(histogram[boundaries[i]:j].sum() - numelements) >=
-               abs(histogram[boundaries[i]:j+1].sum() - numelements)):
+    edges = [0] + boundaries + [histogram.size]
+    padded = 0
+    for first, last, batch_size in zip(edges[:-1], edges[1:], batch_sizes):
+        bucket = histogram[first:last].astype(np.float64)
+        if not bucket.sum():
+            continue
 
-            j += 1
+        #the distribution of the longest sequence in a batch
+        longest = np.diff(np.concatenate(
+            [[0], np.cumsum(bucket)/bucket.sum()])**batch_size)
+        padded += bucket.sum()*(longest*np.arange(first, last)).sum()
 
-        boundaries[i+1] = j
+    frames = (histogram*np.arange(histogram.size)).sum()
+    if not frames:
+        return 0
 
-    return boundaries[1:]
+    return padded/frames - 1
@@ -0,0 +1,125 @@
+'''@file pointer_index.py
+contains the functionality for the compiled pointer index of a data directory
+
+The index contains the names in the pointers file sorted and the pointers in
+the same order as numpy arrays, so the index can be loaded without parsing the
+pointers file and data directories can be joined with a sorted merge.'''
+
+import os
+import numpy as np
+
+#the files of the index in the data directory
+NAMES_FILE = 'index_names.npy'
+POINTERS_FILE = 'index_pointers.npy'
+
+def write_index(datadir):
+    '''compile the pointers file of a data directory into an index
+
+    Args:
+        datadir: the data directory
+
+    Returns:
+        - the sorted names as a numpy array of strings
+        - the pointers as a numpy array of strings
+    '''
+
+    names, pointers = _compile(os.path.join(datadir, 'pointers.scp'))
+
+    #the files are written under a name of the process so processes that
+    #index the same directory do not write to the same file
+    for filename, array in [(NAMES_FILE, names), (POINTERS_FILE, pointers)]:
+        path = os.path.join(datadir, filename)
+        tmp_file = '%s.%d.tmp' % (path, os.getpid())
+        with open(tmp_file, 'w') as fid:
+            np.save(fid, array)
+        os.rename(tmp_file, path)
+
+    return names, pointers
+
+def read_index(datadir):
+    '''read the index of a data directory, the index is compiled first if it
+    does not exist or if it is older than the pointers file
+
+    Args:
+        datadir: the data directory
+
+    Returns:
+        - the sorted names as a numpy array of strings
+        - the pointers as a numpy array of strings
+    '''
+
+    scp_file = os.path.join(datadir, 'pointers.scp')
+    names_file = os.path.join(datadir, NAMES_FILE)
+    pointers_file = os.path.join(datadir, POINTERS_FILE)
+
+    if (not os.path.exists(names_file) or not os.path.exists(pointers_file)
+            or os.path.getmtime(names_file) < os.path.getmtime(scp_file)
+            or os.path.getmtime(pointers_file) < os.path.getmtime(scp_file)):
+        try:
+            return write_index(datadir)
+        except (IOError, OSError):
+            #the data directory is not writable, compile the index in memory
+            return _compile(scp_file)
+
+    return np.load(names_file), np.load(pointers_file)
+
+def join(indices):
+    '''join the indices of several data directories on the names with a
+    sorted merge
+
+    Args:
+        indices: the indices as a list of (names, pointers) tuples with sorted
+            names
+
+    Returns:
+        - the names that are in all indices as a numpy array of strings
+        - the pointers of these names as a list of numpy arrays, one for every
+            index
+        - the number of names of every index that are not in all indices as a
+            list
+    '''
+
+    #keep the names of the first index that are found in all other indices
+    names = indices[0][0]
+    found = np.ones(names.size, dtype=bool)
+    positions = []
+    for other, _ in indices[1:]:
+        position = np.minimum(np.searchsorted(other, names),
+                              max(other.size - 1, 0))
+        if other.size:
+            found &= other[position] == names
+        else:
+            found[:] = False
+        positions.append(position)
+
+    names = names[found]
+    pointers = [indices[0][1][found]]
+    pointers += [
+        index[1][position[found]]
+        for index, position in zip(indices[1:], positions)]
+    missing = [index[0].size - names.size for index in indices]
+
+    return names, pointers, missing
+
+def _compile(scp_file):
+    '''compile the index of a pointers file without writing it
+
+    Args:
+        scp_file: the path to the pointers file
+
+    Returns:
+        - the sorted names as a numpy array of strings
+        - the pointers as a numpy array of strings
+    '''
+
+    pointers = dict()
+    with open(scp_file) as fid:
+        for line in fid:
+            name, pointer = line.strip().split('\t')
+            pointers[name] = pointer
+
+    #a name that occurs more than once gets its last pointer
+    names = sorted(pointers.keys())
+
+    return (np.array(names, dtype=np.string_),
+            np.array([pointers[name] for name in names], dtype=np.string_))
@@ -2,4 +2,5 @@
 contains the data processors'''
 
 from . import processor, processor_factory, audio_processor, text_processor,\
-binary_processor, alignment_processor
+binary_processor, alignment_processor, pipe_executor,\
+encoded_text_processor, kaldi_processor, raw_audio_processor, wav_reader
@@ -44,14 +44,7 @@ class AlignmentProcessor(processor.Processor):
         if not max_length or seq_length <= max_length:
 
             #update the metadata
-            self.max_length = max(self.max_length, seq_length)
-            if seq_length >= self.sequence_length_histogram.shape[0]:
-                self.sequence_length_histogram = np.concatenate(
-                    [self.sequence_length_histogram, np.zeros(
-                        seq_length-self.sequence_length_histogram.shape[0]+1,
-                        dtype=np.int32)]
-                )
-            self.sequence_length_histogram[seq_length] += 1
+            self.add_length(seq_length)
             self.dim = max(self.dim, alignments.max())
 
             return alignments
@@ -59,6 +52,18 @@ class AlignmentProcessor(processor.Processor):
 
             return None
 
+    def merge_metadata(self, processor):
+        '''merge the metadata of an other processor into this processor, used
+        when the data is processed in shards
+
+        Args:
+            processor: an AlignmentProcessor that processed an other part of
+                the data'''
+
+        super(AlignmentProcessor, self).merge_metadata(processor)
+
+        self.dim = max(self.dim, processor.dim)
+
     def write_metadata(self, datadir):
         '''write the processor metadata to disk
 
@@ -70,5 +75,11 @@ class AlignmentProcessor(processor.Processor):
         with open(os.path.join(datadir, 'sequence_length_histogram.npy'),
                   'w') as fid:
             np.save(fid, self.sequence_length_histogram)
+        #if the data was prepared before only part of the alignments were
+        #processed, so the dimension can not be smaller than before
+        dim = self.dim + 1
+        if os.path.exists(os.path.join(datadir, 'dim')):
+            with open(os.path.join(datadir, 'dim')) as fid:
+                dim = max(dim, int(fid.read()))
         with open(os.path.join(datadir, 'dim'), 'w') as fid:
-            fid.write(str(self.dim+1))
+            fid.write(str(dim))
@@ -3,12 +3,18 @@ contains the AudioProcessor class'''
 
 
 import os
+import io
 import subprocess
 import StringIO
+from collections import OrderedDict
 import scipy.io.wavfile as wav
 import numpy as np
 import processor
+from pipe_executor import PipeExecutor
+from wav_reader import WavReader
 from nabu.processing.feature_computers import feature_computer_factory
+from nabu.processing.feature_computers.online_feature_computer import \
+    OnlineFeatureComputer
 
 class AudioProcessor(processor.Processor):
     '''a processor for audio files, this will compute features'''
@@ -24,6 +30,54 @@ class AudioProcessor(processor.Processor):
         self.comp = feature_computer_factory.factory(
             conf.get('feature', 'feature'))(conf)
 
+        #the mean and variance normalization, utterance normalizes with the
+        #statistics of the complete utterance, running and window normalize
+        #every frame with the statistics of the previous frames
+        if conf.has_option('processor', 'cmvn'):
+            self.cmvn = conf.get('processor', 'cmvn')
+        else:
+            self.cmvn = 'utterance'
+        if conf.has_option('processor', 'cmvn_window'):
+            self.cmvn_window = int(conf.get('processor', 'cmvn_window'))
+        else:
+            self.cmvn_window = 300
+
+        #the online feature computers for every sampling rate
+        self.online = dict()
+
+        #the most recently used recordings, segments of wav files are read
+        #from the file with a WavReader and segments of recordings that are
+        #read with a command are cut from the decoded recording in memory
+        if conf.has_option('processor', 'recording_cache_size'):
+            self.recording_cache_size = int(
+                conf.get('processor', 'recording_cache_size'))
+        else:
+            self.recording_cache_size = 2
+        self.recordings = OrderedDict()
+
+        #the number of audio commands that are run concurrently and the
+        #maximal time a command can run in seconds
+        if conf.has_option('processor', 'pipe_processes'):
+            self.pipe_processes = int(conf.get('processor', 'pipe_processes'))
+        else:
+            self.pipe_processes = 1
+        if (conf.has_option('processor', 'pipe_timeout') and
+                conf.get('processor', 'pipe_timeout') != 'None'):
+            self.pipe_timeout = float(conf.get('processor', 'pipe_timeout'))
+        else:
+            self.pipe_timeout = None
+
+        #the number of utterances whose features are computed together and
+        #the number of frames that are processed at once
+        if conf.has_option('processor', 'batch_size'):
+            self.batch_size = int(conf.get('processor', 'batch_size'))
+        else:
+            self.batch_size = 1
+        if conf.has_option('processor', 'batch_frames'):
+            self.batch_frames = int(conf.get('processor', 'batch_frames'))
+        else:
+            self.batch_frames = 256
+
         #initialize the metadata
         self.dim = self.comp.get_dim()
         self.max_length = 0
@@ -41,36 +95,308 @@ class AudioProcessor(processor.Processor):
             The features as a numpy array'''
 
         #read the wav file
-        rate, utt = _read_wav(dataline)
+        rate, utt = self._read_audio(dataline)
 
-        #compute the features
-        features = self.comp(utt, rate)
+        return self._process_audio(rate, utt)
 
-        #mean and variance normalize the features
-        features = (features-np.mean(features, 0))/np.std(features, 0)
+    def process_all(self, datalines):
+        '''process the data in a list of datalines, the audio commands are run
+        concurrently ahead of the feature computation and the features are
+        computed for batch_size utterances at once
+
+        Args:
+            datalines: a list of datalines
+
+        Yields:
+            the features as a numpy array for every dataline, None if the
+            utterance is discarded or an Exception if the audio command failed
+        '''
+
+        batch = []
+        for audio in self._read_all(datalines):
+            batch.append(audio)
+            if len(batch) == self.batch_size:
+                for processed in self._process_batch(batch):
+                    yield processed
+                batch = []
+
+        for processed in self._process_batch(batch):
+            yield processed
+
+    def _read_all(self, datalines):
+        '''read the audio of a list of datalines, the audio commands are run
+        concurrently
+
+        Args:
+            datalines: a list of datalines
+
+        Yields:
+            the sampling rate and the utterance for every dataline or an
+            Exception if the audio command failed
+        '''
+
+        #the recording of every dataline, the recording of consecutive
+        #piped segments is only decoded once, datalines that are not piped
+        #in between do not start a new command
+        sources = []
+        commands = []
+        for dataline in datalines:
+            recording = self.recording(dataline)
+            source = dataline if recording is None else recording
+            sources.append(source)
+            if source[-1] == '|' and (not commands or source != commands[-1]):
+                commands.append(source)
+
+        decoded = PipeExecutor(self.pipe_processes, self.pipe_timeout)(
+            commands)
+
+        previous = None
+        for dataline, source in zip(datalines, sources):
+
+            if source[-1] != '|':
+                yield self._try_read_audio(dataline)
+                continue
+
+            if source != previous:
+                previous = source
+                output, error = next(decoded)
+                if error is None:
+                    try:
+                        audio = wav.read(io.BytesIO(output))
+                    except Exception as exception:
+                        error = 'could not read the audio: %s' % exception
+                if error is None and source != dataline:
+                    self._cache_recording(source, audio)
+
+            if error is not None:
+                yield Exception('%s %s' % (source, error))
+            elif source != dataline:
+                yield self._try_read_audio(dataline)
+            else:
+                yield audio
+
+    def _process_audio(self, rate, utt):
+        '''compute the features of an utterance
+
+        Args:
+            rate: the sampling rate
+            utt: the utterance as a numpy array
+
+        Returns:
+            The features as a numpy array, None if the utterance is too long'''
+
+        return self._process_batch([(rate, utt)])[0]
+
+    def compute_features(self, rate, utt):
+        '''compute the normalized features of an utterance without updating
+        the metadata
+
+        Args:
+            rate: the sampling rate
+            utt: the utterance as a numpy array
+
+        Returns:
+            The features as a numpy array'''
+
+        return self._compute_batch([(rate, utt)])[0]
+
+    def _process_batch(self, batch):
+        '''compute the features of a batch of utterances, the features of the
+        utterances with the same sampling rate are computed together
+
+        Args:
+            batch: a list containing the sampling rate and the utterance for
+                every utterance or an Exception if it could not be read
+
+        Returns:
+            a list containing the features as a numpy array for every
+            utterance, None if the utterance is too long or the Exception if
+            it could not be read'''
+
+        features = self._compute_batch(batch)
 
         if self.conf['max_length'] != 'None':
             max_length = int(self.conf['max_length'])
         else:
             max_length = None
 
-        if not max_length or features.shape[0] <= max_length:
+        processed = []
+        for audio, feat in zip(batch, features):
+
+            if isinstance(audio, Exception):
+                processed.append(audio)
+                continue
+
+            seq_length = feat.shape[0]
+
+            if not max_length or seq_length <= max_length:
+
+                #update the metadata
+                self.add_length(seq_length)
 
-            #update the metadata
-            self.max_length = max(self.max_length, features.shape[0])
-            seq_length = features.shape[0]
-            if seq_length >= self.sequence_length_histogram.shape[0]:
-                self.sequence_length_histogram = np.concatenate(
-                    [self.sequence_length_histogram, np.zeros(
-                        seq_length-self.sequence_length_histogram.shape[0]+1,
-                        dtype=np.int32)]
-                )
-            self.sequence_length_histogram[seq_length] += 1
+                processed.append(feat)
 
-            return features
+            else:
+                processed.append(None)
+
+        return processed
+
+    def _compute_batch(self, batch):
+        '''compute the normalized features of a batch of utterances
+
+        Args:
+            batch: a list containing the sampling rate and the utterance for
+                every utterance or an Exception if it could not be read
+
+        Returns:
+            a list containing the features as a numpy array for every
+            utterance, None if it could not be read'''
+
+        features = [None]*len(batch)
+
+        if self.cmvn in ['utterance', 'none']:
+
+            #compute the features of the utterances with the same rate at once
+            rates = dict()
+            for i, audio in enumerate(batch):
+                if not isinstance(audio, Exception):
+                    rates.setdefault(audio[0], []).append(i)
+            for rate, indices in rates.items():
+                computed = self.comp.comp_feat_batch(
+                    [batch[i][1] for i in indices], rate, self.batch_frames)
+                for i, feat in zip(indices, computed):
+                    features[i] = feat
 
         else:
-            return None
+
+            #compute and normalize the features with the online feature
+            #computer
+            for i, audio in enumerate(batch):
+                if not isinstance(audio, Exception):
+                    rate, utt = audio
+                    if rate not in self.online:
+                        self.online[rate] = OnlineFeatureComputer(
+                            self.comp, rate, self.cmvn, self.cmvn_window)
+                    online = self.online[rate]
+                    features[i] = np.concatenate([online(utt), online.flush()])
+
+        #mean and variance normalize the features
+        if self.cmvn == 'utterance':
+            features = [
+                None if feat is None
+                else (feat-np.mean(feat, 0))/np.std(feat, 0)
+                for feat in features]
+
+        return features
+
+    def cacheable(self):
+        '''the features can be stored in a shared cache'''
+
+        return True
+
+    def recording(self, dataline):
+        '''get the recording a segment is cut from
+
+        Args:
+            dataline: either a path to a wav file or a command to read and pipe
+                an audio file, optionally followed by segment boundaries
+
+        Returns:
+            the recording as a string, None if the dataline is not a segment'''
+
+        return _split_segment(dataline)[0]
+
+    def _read_audio(self, dataline):
+        '''read the audio in the dataline, segments of wav files only read
+        their samples from the file and segments of commands are cut from the
+        decoded recordings in memory
+
+        Args:
+            dataline: either a path to a wav file or a command to read and pipe
+                an audio file, optionally followed by segment boundaries
+
+        Returns:
+            - the sampling rate
+            - the utterance as a numpy array
+        '''
+
+        recording, begin, end = _split_segment(dataline)
+
+        if recording is None:
+            return _read_wav(dataline)
+
+        if recording in self.recordings:
+            #mark the recording as most recently used
+            self._cache_recording(recording, self.recordings.pop(recording))
+        else:
+            self._cache_recording(recording, _open_recording(recording))
+
+        audio = self.recordings[recording]
+
+        if isinstance(audio, WavReader):
+            return audio.read(int(begin*audio.rate), int(end*audio.rate))
+
+        rate, full_utterance = audio
+
+        return rate, full_utterance[int(begin*rate):int(end*rate)]
+
+    def _try_read_audio(self, dataline):
+        '''read the audio in the dataline with _read_audio, a missing or
+        corrupt file only fails the utterance
+
+        Args:
+            dataline: the dataline
+
+        Returns:
+            the sampling rate and the utterance or an Exception if the audio
+            could not be read
+        '''
+
+        try:
+            return self._read_audio(dataline)
+        except Exception as exception:
+            return Exception('%s could not read the audio: %s' % (
+                dataline, exception))
+
+    def _cache_recording(self, recording, audio):
+        '''add a decoded recording to the cache as the most recently used
+
+        Args:
+            recording: the recording as a string
+            audio: a WavReader for the recording or the sampling rate and the
+                decoded recording as a numpy array'''
+
+        self.recordings[recording] = audio
+        if len(self.recordings) > max(self.recording_cache_size, 1):
+            self.recordings.popitem(last=False)
+
+    def __getstate__(self):
+        '''the decoded recordings are not pickled'''
+
+        state = self.__dict__.copy()
+        state['recordings'] = OrderedDict()
+
+        return state
+
+    def fingerprint(self, dataline):
+        '''get a fingerprint of the source of the data in dataline, contains
+        the modification time and size of the audio files in the dataline
+
+        Args:
+            dataline: either a path to a wav file or a command to read and pipe
+                an audio file, optionally followed by segment boundaries
+
+        Returns:
+            the fingerprint as a string'''
+
+        fingerprint = [dataline]
+        for part in dataline.split(' '):
+            if os.path.isfile(part):
+                stat = os.stat(part)
+                fingerprint.append('%s:%d:%d' % (
+                    part, stat.st_mtime, stat.st_size))
+
+        return ' '.join(fingerprint)
 
     def write_metadata(self, datadir):
         '''write the processor metadata to disk
@@ -92,14 +418,25 @@ def _read_wav(wavfile):
 
     Args:
         wavfile: either a path to a wav file or a command to read and pipe
-            an audio file
+            an audio file, optionally followed by segment boundaries
 
     Returns:
         - the sampling rate
         - the utterance as a numpy array
     '''
 
-    if os.path.exists(wavfile):
+    recording, begin, end = _split_segment(wavfile)
+
+    if recording is not None:
+        #its a segment of an utterance
+        audio = _open_recording(recording)
+        if isinstance(audio, WavReader):
+            rate = audio.rate
+            _, utterance = audio.read(int(begin*rate), int(end*rate))
+        else:
+            rate, full_utterance = audio
+            utterance = full_utterance[int(begin*rate):int(end*rate)]
+    elif os.path.exists(wavfile):
         #its a file
         (rate, utterance) = wav.read(wavfile)
     elif wavfile[-1] == '|':
@@ -112,13 +449,54 @@ def _read_wav(wavfile):
         output_buffer = StringIO.StringIO(output)
         (rate, utterance) = wav.read(output_buffer)
     else:
-        #its a segment of an utterance
-        split = wavfile.split(' ')
-        begin = float(split[-2])
-        end = float(split[-1])
-        unsegmented = ' '.join(split[:-2])
-        rate, full_utterance = _read_wav(unsegmented)
-        utterance = full_utterance[int(begin*rate):int(end*rate)]
-
+        raise Exception('the file does not exist')
 
     return rate, utterance
+
+def _open_recording(recording):
+    '''
+    open a recording that segments are cut from
+
+    Args:
+        recording: either a path to a wav file or a command to read and pipe
+            an audio file
+
+    Returns:
+        a WavReader if the recording is a wav file that can be read in parts,
+        otherwise the sampling rate and the decoded recording as a numpy array
+    '''
+
+    if os.path.isfile(recording):
+        try:
+            return WavReader(recording)
+        except Exception:
+            #formats the WavReader can not read are decoded completely
+            pass
+
+    return _read_wav(recording)
+
+def _split_segment(wavfile):
+    '''
+    split a segment into the recording and the segment boundaries
+
+    Args:
+        wavfile: either a path to a wav file or a command to read and pipe
+            an audio file, optionally followed by segment boundaries
+
+    Returns:
+        - the recording, None if wavfile is not a segment
+        - the begin of the segment in seconds
+        - the end of the segment in seconds
+    '''
+
+    if os.path.exists(wavfile) or wavfile[-1] == '|':
+        return None, None, None
+
+    split = wavfile.split(' ')
+
+    #a missing file without segment boundaries is not a segment, it fails
+    #when it is read
+    try:
+        return ' '.join(split[:-2]), float(split[-2]), float(split[-1])
+    except (IndexError, ValueError):
+        return None, None, None
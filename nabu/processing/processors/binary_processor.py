@@ -41,14 +41,7 @@ class BinaryProcessor(processor.Processor):
         if not max_length or seq_length <= max_length:
 
             #update the metadata
-            self.max_length = max(self.max_length, seq_length)
-            if seq_length >= self.sequence_length_histogram.shape[0]:
-                self.sequence_length_histogram = np.concatenate(
-                    [self.sequence_length_histogram, np.zeros(
-                        seq_length-self.sequence_length_histogram.shape[0]+1,
-                        dtype=np.int32)]
-                )
-            self.sequence_length_histogram[seq_length] += 1
+            self.add_length(seq_length)
 
             return binary
 
@@ -0,0 +1,73 @@
+'''@file encoded_text_processor.py
+Contains the EncodedTextProcessor'''
+
+import os
+import numpy as np
+import text_processor
+
+class EncodedTextProcessor(text_processor.TextProcessor):
+    '''a processor for text data, does normalization and encodes the
+    normalized text as the indices of the symbols in the alphabet'''
+
+    def __init__(self, conf):
+        '''EncodedTextProcessor constructor
+
+        Args:
+            conf: processor configuration as a configparser
+        '''
+
+        super(EncodedTextProcessor, self).__init__(conf)
+
+        #the index of every symbol, the nonesymbol gets index -1
+        self.indices = {self.nonesymbol: -1}
+        self.indices.update(
+            [(symbol, index) for index, symbol in enumerate(self.alphabet)])
+
+        #the smallest integer type that can hold all indices
+        if len(self.alphabet) <= np.iinfo(np.int16).max:
+            self.dtype = np.int16
+        else:
+            self.dtype = np.int32
+
+    def __call__(self, dataline):
+        '''process the data in dataline
+        Args:
+            dataline: a line of text
+
+        Returns:
+            The encoded text as a numpy array'''
+
+        normalized = super(EncodedTextProcessor, self).__call__(dataline)
+
+        if normalized is None:
+            return None
+
+        try:
+            encoded = [self.indices[symbol]
+                       for symbol in normalized.split(' ')]
+        except KeyError as error:
+            raise Exception('symbol %s not found in alphabet' % error)
+
+        return np.array(encoded, dtype=self.dtype)
+
+    def get_length(self, processed):
+        '''get the sequence length of processed data
+
+        Args:
+            processed: the encoded text
+
+        Returns:
+            the sequence length as an integer'''
+
+        return processed.shape[0]
+
+    def write_metadata(self, datadir):
+        '''write the processor metadata to disk
+
+        Args:
+            dir: the directory where the metadata should be written'''
+
+        super(EncodedTextProcessor, self).write_metadata(datadir)
+
+        with open(os.path.join(datadir, 'dtype'), 'w') as fid:
+            fid.write(np.dtype(self.dtype).name)
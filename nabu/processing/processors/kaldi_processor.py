@@ -0,0 +1,159 @@
+'''@file kaldi_processor.py
+contains the KaldiProcessor class'''
+
+import os
+import struct
+import numpy as np
+import processor
+
+#the numpy types of the binary kaldi matrix formats
+MATRIX_TYPES = {'FM': 'float32', 'DM': 'float64'}
+
+class KaldiProcessor(processor.Processor):
+    '''a processor for binary kaldi archives, it does not copy the data but
+    reads the headers of the matrices or integer vectors (e.g. alignments)
+    in the archives and returns pointers to their data'''
+
+    def __init__(self, conf):
+        '''KaldiProcessor constructor
+
+        Args:
+            conf: processor configuration as a configparser
+        '''
+
+        #initialize the metadata
+        self.max_length = 0
+        self.sequence_length_histogram = np.zeros(0, dtype=np.int32)
+        self.dim = 0
+        self.codec = None
+
+        super(KaldiProcessor, self).__init__(conf)
+
+    def __call__(self, dataline):
+        '''process the data in dataline
+
+        Args:
+            dataline: the location of the data in an archive in the form
+                ark:offset, as in a kaldi scp file
+
+        Returns:
+            the pointer to the data in the form ark:offset:rows'''
+
+        arkfile, offset = dataline.rsplit(':', 1)
+        if not offset.isdigit():
+            raise Exception('unsupported kaldi location %s' % dataline)
+
+        with open(arkfile, 'rb') as fid:
+            fid.seek(int(offset))
+            if fid.read(2) != '\0B':
+                raise Exception('%s is not a binary kaldi object' % dataline)
+
+            token = fid.read(1)
+            if token == '\4':
+                #an integer vector, every element is preceded by its size so
+                #the values are read to determine the dimension
+                rows = struct.unpack('<i', fid.read(4))[0]
+                cols = 1
+                codec = 'int32'
+                data_offset = fid.tell()
+                values = np.frombuffer(
+                    fid.read(5*rows),
+                    dtype=[('size', 'i1'), ('value', '<i4')])['value']
+                dim = values.max() + 1 if rows else 0
+            else:
+                token += fid.read(2)
+                if token[:2] not in MATRIX_TYPES or token[2] != ' ':
+                    raise Exception('unsupported kaldi type %s in %s' % (
+                        token.strip(), dataline))
+                codec = MATRIX_TYPES[token[:2]]
+                rows, cols = struct.unpack('<xixi', fid.read(10))
+                data_offset = fid.tell()
+                dim = cols
+
+        if self.codec is None:
+            self.codec = codec
+        elif self.codec != codec:
+            raise Exception('all kaldi objects must have the same type')
+        if codec != 'int32' and self.dim and self.dim != dim:
+            raise Exception('all kaldi matrices must have the same dimension')
+
+        if self.conf['max_length'] != 'None':
+            max_length = int(self.conf['max_length'])
+        else:
+            max_length = None
+
+        if not max_length or rows <= max_length:
+
+            #update the metadata
+            self.add_length(rows)
+            self.dim = max(self.dim, dim)
+
+            return '%s:%d:%d' % (arkfile, data_offset, rows)
+
+        else:
+            return None
+
+    def get_length(self, processed):
+        '''get the sequence length of processed data
+
+        Args:
+            processed: the pointer to the data
+
+        Returns:
+            the sequence length as an integer'''
+
+        return int(processed.rsplit(':', 1)[1])
+
+    def fingerprint(self, dataline):
+        '''get a fingerprint of the source of the data in dataline, contains
+        the modification time and size of the archive
+
+        Args:
+            dataline: the location of the data in an archive
+
+        Returns:
+            the fingerprint as a string'''
+
+        arkfile = dataline.rsplit(':', 1)[0]
+        if not os.path.isfile(arkfile):
+            return dataline
+
+        stat = os.stat(arkfile)
+
+        return '%s %d:%d' % (dataline, stat.st_mtime, stat.st_size)
+
+    def merge_metadata(self, processor):
+        '''merge the metadata of an other processor into this processor, used
+        when the data is processed in shards
+
+        Args:
+            processor: a KaldiProcessor that processed an other part of the
+                data'''
+
+        super(KaldiProcessor, self).merge_metadata(processor)
+
+        self.dim = max(self.dim, processor.dim)
+        self.codec = self.codec or processor.codec
+
+    def write_metadata(self, datadir):
+        '''write the processor metadata to disk
+
+        Args:
+            dir: the directory where the metadata should be written'''
+
+        with open(os.path.join(datadir, 'max_length'), 'w') as fid:
+            fid.write(str(self.max_length))
+        with open(os.path.join(datadir, 'sequence_length_histogram.npy'),
+                  'w') as fid:
+            np.save(fid, self.sequence_length_histogram)
+        #if the data was prepared before only part of the objects were
+        #processed, so the dimension can not be smaller than before
+        dim = self.dim
+        if os.path.exists(os.path.join(datadir, 'dim')):
+            with open(os.path.join(datadir, 'dim')) as fid:
+                dim = max(dim, int(fid.read()))
+        with open(os.path.join(datadir, 'dim'), 'w') as fid:
+            fid.write(str(dim))
+        if self.codec is not None:
+            with open(os.path.join(datadir, 'codec'), 'w') as fid:
+                fid.write(self.codec)
@@ -0,0 +1,154 @@
+'''@file pipe_executor.py
+contains the PipeExecutor class'''
+
+import os
+import io
+import time
+import signal
+import threading
+import subprocess
+import tempfile
+from collections import deque
+
+class PipeExecutor(object):
+    '''runs commands that pipe their output concurrently
+
+    A bounded number of commands is kept running ahead of the consumer, the
+    outputs are read into preallocated buffers by a thread per command and
+    are returned in the order of the commands'''
+
+    def __init__(self, num_processes, timeout=None, buffer_size=2**22):
+        '''PipeExecutor constructor
+
+        Args:
+            num_processes: the maximal number of commands that are running at
+                the same time
+            timeout: the maximal time a command can run in seconds, None for
+                no maximum
+            buffer_size: the initial size of the output buffer in bytes, the
+                buffer is doubled if the output does not fit
+        '''
+
+        self.num_processes = max(int(num_processes), 1)
+        self.timeout = timeout
+        self.buffer_size = buffer_size
+
+    def __call__(self, commands):
+        '''run the commands
+
+        Args:
+            commands: an iterable of shell commands whose output ends in a pipe
+
+        Yields:
+            for every command in order:
+            - the output as a bytearray, None if the command failed
+            - the error message as a string, None if the command succeeded
+        '''
+
+        commands = iter(commands)
+        running = deque()
+
+        while True:
+
+            #start commands until the maximal number of commands is running
+            while len(running) < self.num_processes:
+                command = next(commands, None)
+                if command is None:
+                    break
+                running.append(_PipeJob(command, self.buffer_size))
+
+            if not running:
+                break
+
+            yield running.popleft().result(self.timeout)
+
+class _PipeJob(object):
+    '''a running command whose output is read into a buffer'''
+
+    def __init__(self, command, buffer_size):
+        '''_PipeJob constructor, starts the command
+
+        Args:
+            command: the shell command whose output ends in a pipe
+            buffer_size: the initial size of the output buffer in bytes
+        '''
+
+        self.command = command
+        self.start = time.time()
+        self.buffer = bytearray(buffer_size)
+        self.size = 0
+        self.exception = None
+
+        #the error output is written to a file so it can not block the command,
+        #the command gets its own process group so the complete pipeline can
+        #be killed. The pipeline is run with pipefail so the exit status is
+        #the one of the failing command and not the one of tee
+        self.stderr = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(
+            ['bash', '-o', 'pipefail', '-c', command + ' tee'],
+            stdout=subprocess.PIPE, stderr=self.stderr, preexec_fn=os.setsid)
+
+        self.thread = threading.Thread(target=self._read)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def _read(self):
+        '''read the output of the command into the buffer'''
+
+        try:
+            stdout = io.open(self.process.stdout.fileno(), 'rb', closefd=False)
+            view = memoryview(self.buffer)
+            while True:
+                if self.size == len(self.buffer):
+                    #double the buffer if it is full, a bytearray can not be
+                    #resized while a memoryview of it exists
+                    del view
+                    self.buffer.extend(bytearray(len(self.buffer)))
+                    view = memoryview(self.buffer)
+                read = stdout.readinto(view[self.size:])
+                if not read:
+                    break
+                self.size += read
+        except Exception as exception:
+            self.exception = exception
+        finally:
+            self.process.stdout.close()
+
+    def result(self, timeout):
+        '''wait for the command to finish
+
+        Args:
+            timeout: the maximal time the command can run in seconds since it
+                was started, None for no maximum
+
+        Returns:
+            - the output as a bytearray, None if the command failed
+            - the error message as a string, None if the command succeeded
+        '''
+
+        if timeout is None:
+            self.thread.join()
+        else:
+            self.thread.join(max(self.start + timeout - time.time(), 0))
+
+        if self.thread.is_alive():
+            os.killpg(self.process.pid, signal.SIGKILL)
+            self.process.wait()
+            self.thread.join()
+            self.stderr.close()
+            return None, 'timed out after %s seconds' % timeout
+
+        returncode = self.process.wait()
+        self.stderr.seek(0)
+        error = self.stderr.read().strip()
+        self.stderr.close()
+
+        if self.exception is not None:
+            return None, 'could not read the output: %s' % self.exception
+        if returncode != 0:
+            return None, 'exited with status %d: %s' % (returncode, error)
+
+        #drop the unused part of the buffer without copying the output
+        del self.buffer[self.size:]
+
+        return self.buffer, None
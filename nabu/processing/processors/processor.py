@@ -2,6 +2,7 @@
 contains the Processor class'''
 
 from abc import ABCMeta, abstractmethod
+import numpy as np
 
 class Processor(object):
     '''general Processor class for data processing'''
@@ -26,6 +27,99 @@ class Processor(object):
         Returns:
             The processed data'''
 
+    def process_all(self, datalines):
+        '''process the data in a list of datalines
+
+        Args:
+            datalines: a list of datalines
+
+        Yields:
+            the processed data for every dataline, None if the data is
+            discarded or an Exception if the dataline could not be processed'''
+
+        for dataline in datalines:
+            yield self(dataline)
+
+    def add_length(self, seq_length):
+        '''add the sequence length of a processed example to the metadata
+
+        Args:
+            seq_length: the sequence length of the example'''
+
+        self.max_length = max(self.max_length, seq_length)
+        if seq_length >= self.sequence_length_histogram.shape[0]:
+            self.sequence_length_histogram = np.concatenate(
+                [self.sequence_length_histogram, np.zeros(
+                    seq_length-self.sequence_length_histogram.shape[0]+1,
+                    dtype=np.int32)]
+            )
+        self.sequence_length_histogram[seq_length] += 1
+
+    def get_length(self, processed):
+        '''get the sequence length of processed data
+
+        Args:
+            processed: the data returned by the processor
+
+        Returns:
+            the sequence length as an integer'''
+
+        return len(processed)
+
+    def recording(self, dataline):
+        '''get the recording the data in dataline is part of, the datalines of
+        the same recording are processed together
+
+        Args:
+            dataline: a string, can be a line of text a pointer to a file etc.
+
+        Returns:
+            the recording as a string, None if the data is not part of a larger
+            recording'''
+
+        return None
+
+    def fingerprint(self, dataline):
+        '''get a fingerprint of the source of the data in dataline, if the
+        fingerprint changes the data has to be processed again
+
+        Args:
+            dataline: a string, can be a line of text a pointer to a file etc.
+
+        Returns:
+            the fingerprint as a string'''
+
+        return dataline
+
+    def cacheable(self):
+        '''whether the processed data can be stored in a shared cache, the
+        processed data must be a numpy array and the metadata must only depend
+        on the sequence lengths
+
+        Returns:
+            a boolean'''
+
+        return False
+
+    def merge_metadata(self, processor):
+        '''merge the metadata of an other processor into this processor, used
+        when the data is processed in shards
+
+        Args:
+            processor: a processor of the same type that processed an other
+                part of the data'''
+
+        self.max_length = max(self.max_length, processor.max_length)
+
+        histogram = processor.sequence_length_histogram
+        if histogram.shape[0] > self.sequence_length_histogram.shape[0]:
+            self.sequence_length_histogram = np.concatenate(
+                [self.sequence_length_histogram, np.zeros(
+                    histogram.shape[0]-self.sequence_length_histogram.shape[0],
+                    dtype=np.int32)]
+            )
+        self.sequence_length_histogram[:histogram.shape[0]] += histogram
+
     @abstractmethod
     def write_metadata(self, datadir):
         '''write the processor metadata to disk
@@ -2,7 +2,8 @@
 contains the Processor factory method'''
 
 from . import audio_processor, text_processor, binary_processor, \
-alignment_processor
+alignment_processor, encoded_text_processor, kaldi_processor, \
+raw_audio_processor
 
 def factory(processor):
     '''gets a Processor class
@@ -21,5 +22,11 @@ def factory(processor):
         return binary_processor.BinaryProcessor
     elif processor == 'alignment_processor':
         return alignment_processor.AlignmentProcessor
+    elif processor == 'encoded_text_processor':
+        return encoded_text_processor.EncodedTextProcessor
+    elif processor == 'kaldi_processor':
+        return kaldi_processor.KaldiProcessor
+    elif processor == 'raw_audio_processor':
+        return raw_audio_processor.RawAudioProcessor
     else:
         raise Exception('unknown processor type: %s' % processor)
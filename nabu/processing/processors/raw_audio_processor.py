@@ -0,0 +1,143 @@
+'''@file raw_audio_processor.py
+contains the RawAudioProcessor class'''
+
+import os
+import numpy as np
+import audio_processor
+from nabu.processing.feature_computers import sigproc
+
+class RawAudioProcessor(audio_processor.AudioProcessor):
+    '''a processor for audio files that stores the 16 bit audio samples, the
+    features are computed when the data is read (see RawAudioReader)
+
+    The sequence lengths in the metadata are the number of samples. The
+    configuration is written to the data directory, the features are computed
+    with the feature section unless an other feature configuration is given
+    to the reader.'''
+
+    def __init__(self, conf):
+        '''RawAudioProcessor constructor
+
+        Args:
+            conf: processor configuration as a configparser
+        '''
+
+        super(RawAudioProcessor, self).__init__(conf)
+
+        #keep the configuration so it can be written to the data directory
+        self.parsed_conf = conf
+
+        #the sampling rate of all audio
+        self.rate = None
+
+    def _process_batch(self, batch):
+        '''check a batch of utterances and update the metadata
+
+        Args:
+            batch: a list containing the sampling rate and the utterance for
+                every utterance or an Exception if it could not be read
+
+        Returns:
+            a list containing the audio as an int16 numpy array for every
+            utterance, None if the utterance is too long or an Exception if
+            it could not be read or is not 16 bit audio with the common
+            sampling rate'''
+
+        if self.conf['max_length'] != 'None':
+            max_length = int(self.conf['max_length'])
+        else:
+            max_length = None
+
+        processed = []
+        for audio in batch:
+
+            if isinstance(audio, Exception):
+                processed.append(audio)
+                continue
+
+            #audio that can not be stored is reported for the utterance
+            rate, utt = audio
+            if utt.dtype != np.int16:
+                processed.append(Exception(
+                    'raw audio must be 16 bit PCM, got %s' % utt.dtype))
+                continue
+            if self.rate is None:
+                self.rate = rate
+            elif self.rate != rate:
+                processed.append(Exception(
+                    'all raw audio must have the same sampling rate, got %d '
+                    'instead of %d' % (rate, self.rate)))
+                continue
+
+            #the maximum length is the number of frames
+            numframes = sigproc.numframes(
+                utt.size, rate, float(self.comp.conf['winlen']),
+                float(self.comp.conf['winstep']))
+
+            if not max_length or numframes <= max_length:
+
+                #update the metadata
+                self.add_length(utt.size)
+
+                processed.append(utt)
+
+            else:
+                processed.append(None)
+
+        return processed
+
+    def cacheable(self):
+        '''the sampling rate in the metadata depends on the audio, so the raw
+        audio is not cached'''
+
+        return False
+
+    def merge_metadata(self, processor):
+        '''merge the metadata of an other processor into this processor, used
+        when the data is processed in shards
+
+        Args:
+            processor: a RawAudioProcessor that processed an other part of the
+                data'''
+
+        super(RawAudioProcessor, self).merge_metadata(processor)
+
+        if self.rate is None:
+            self.rate = processor.rate
+        elif processor.rate is not None and self.rate != processor.rate:
+            raise Exception('all raw audio must have the same sampling rate')
+
+    def __getstate__(self):
+        '''the configparser is not pickled'''
+
+        state = super(RawAudioProcessor, self).__getstate__()
+        state['parsed_conf'] = None
+
+        return state
+
+    def write_metadata(self, datadir):
+        '''write the processor metadata to disk
+
+        Args:
+            dir: the directory where the metadata should be written'''
+
+        with open(os.path.join(datadir, 'sequence_length_histogram.npy'),
+                  'w') as fid:
+            np.save(fid, self.sequence_length_histogram)
+        with open(os.path.join(datadir, 'max_length'), 'w') as fid:
+            fid.write(str(self.max_length))
+
+        #if the data was prepared before all utterances may have been
+        #processed before
+        rate = self.rate
+        if rate is None and os.path.exists(os.path.join(datadir, 'rate')):
+            with open(os.path.join(datadir, 'rate')) as fid:
+                rate = int(fid.read())
+        if rate is not None:
+            with open(os.path.join(datadir, 'rate'), 'w') as fid:
+                fid.write(str(rate))
+
+        if self.parsed_conf is not None:
+            with open(os.path.join(datadir, 'feature_processor.cfg'),
+                      'w') as fid:
+                self.parsed_conf.write(fid)
@@ -16,10 +16,6 @@ class TextProcessor(processor.Processor):
             conf: processor configuration as a configparser
         '''
 
-        #create the normalizer
-        self.normalizer = normalizer_factory.factory(
-            conf.get('processor', 'normalizer'))
-
         self.alphabet = conf.get('processor', 'alphabet').split(' ')
 
         #initialize the metadata
@@ -30,6 +26,17 @@ class TextProcessor(processor.Processor):
         else:
             self.nonesymbol = ''
 
+        #create the normalizer for the alphabet, the options in the
+        #normalizer section that the normalizer takes are passed to it
+        normalizer = conf.get('processor', 'normalizer')
+        if conf.has_section('normalizer'):
+            options = normalizer_factory.compiled_options(
+                normalizer, dict(conf.items('normalizer')))
+        else:
+            options = dict()
+        self.normalizer = normalizer_factory.compiled_factory(normalizer)(
+            self.alphabet + [self.nonesymbol], **options)
+
         super(TextProcessor, self).__init__(conf)
 
     def __call__(self, dataline):
@@ -41,9 +48,7 @@ class TextProcessor(processor.Processor):
             The normalized text as a string'''
 
         #normalize the line
-        normalized = self.normalizer(
-            dataline,
-            self.alphabet + [self.nonesymbol])
+        normalized = self.normalizer(dataline)
 
         seq_length = len(normalized.split(' '))
 
@@ -54,19 +59,23 @@ class TextProcessor(processor.Processor):
 
         if not max_length or seq_length <= max_length:
             #update the metadata
-            self.max_length = max(self.max_length, seq_length)
-            if seq_length >= self.sequence_length_histogram.shape[0]:
-                self.sequence_length_histogram = np.concatenate(
-                    [self.sequence_length_histogram, np.zeros(
-                        seq_length-self.sequence_length_histogram.shape[0]+1,
-                        dtype=np.int32)]
-                )
-            self.sequence_length_histogram[seq_length] += 1
+            self.add_length(seq_length)
 
             return normalized
         else:
             return None
 
+    def get_length(self, processed):
+        '''get the sequence length of processed data
+
+        Args:
+            processed: the normalized text
+
+        Returns:
+            the sequence length as an integer'''
+
+        return len(processed.split(' '))
+
     def write_metadata(self, datadir):
         '''write the processor metadata to disk
 
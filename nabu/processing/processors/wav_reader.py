@@ -0,0 +1,114 @@
+'''@file wav_reader.py
+contains the WavReader class'''
+
+import struct
+import numpy as np
+
+class WavReader(object):
+    '''reads parts of a wav file
+
+    The header is parsed once, a part of the recording is read by seeking to
+    its first sample so only the samples in the part are read'''
+
+    def __init__(self, filename):
+        '''WavReader constructor, parses the header
+
+        Args:
+            filename: the path to the wav file
+
+        Raises:
+            Exception if the file is not a wav file that can be read in parts
+        '''
+
+        self.filename = filename
+
+        with open(filename, 'rb') as fid:
+
+            riff = fid.read(12)
+            if len(riff) < 12 or riff[8:12] != 'WAVE':
+                raise Exception('%s is not a wav file' % filename)
+            if riff[:4] == 'RIFF':
+                byteorder = '<'
+            elif riff[:4] == 'RIFX':
+                byteorder = '>'
+            else:
+                raise Exception('%s is not a wav file' % filename)
+
+            #find the format and the data chunk
+            fmt = None
+            while True:
+                header = fid.read(8)
+                if len(header) < 8:
+                    raise Exception('%s contains no data chunk' % filename)
+                chunk_id = header[:4]
+                chunk_size = struct.unpack(byteorder + 'I', header[4:])[0]
+                if chunk_id == 'fmt ':
+                    fmt = fid.read(chunk_size)
+                    fid.seek(chunk_size % 2, 1)
+                elif chunk_id == 'data':
+                    break
+                else:
+                    #chunks are padded to an even size
+                    fid.seek(chunk_size + chunk_size % 2, 1)
+
+            if fmt is None or len(fmt) < 16:
+                raise Exception('%s contains no format chunk' % filename)
+
+            self.offset = fid.tell()
+
+            #the size in the header is not reliable for streamed files
+            fid.seek(0, 2)
+            size = min(chunk_size, fid.tell() - self.offset)
+
+        format_tag, self.channels, self.rate, _, block_align, bits = \
+            struct.unpack(byteorder + 'HHIIHH', fmt[:16])
+
+        #the extensible format contains the actual format in the subformat
+        if format_tag == 0xFFFE and len(fmt) >= 26:
+            format_tag = struct.unpack(byteorder + 'H', fmt[24:26])[0]
+
+        if format_tag == 1 and bits == 8:
+            self.dtype = np.dtype('u1')
+        elif format_tag == 1 and bits in [16, 32]:
+            self.dtype = np.dtype('%si%d' % (byteorder, bits/8))
+        elif format_tag == 3 and bits in [32, 64]:
+            self.dtype = np.dtype('%sf%d' % (byteorder, bits/8))
+        else:
+            raise Exception('%s has an unsupported format (%d, %d bits)' % (
+                filename, format_tag, bits))
+
+        if block_align != self.dtype.itemsize*self.channels:
+            raise Exception('%s has an unsupported block size' % filename)
+
+        self.num_samples = size/block_align
+
+    def read(self, begin=None, end=None):
+        '''read samples from the file
+
+        Args:
+            begin: the first sample, None to start at the first sample
+            end: the sample after the last sample, None to read until the end.
+                The samples are selected like a slice of the complete recording
+
+        Returns:
+            - the sampling rate
+            - the samples as a numpy array of shape [samples] for a single
+                channel and [samples x channels] for multiple channels, like
+                scipy.io.wavfile.read
+        '''
+
+        begin, end, _ = slice(begin, end).indices(self.num_samples)
+        count = max(end - begin, 0)
+
+        with open(self.filename, 'rb') as fid:
+            fid.seek(self.offset + begin*self.dtype.itemsize*self.channels)
+            samples = np.fromfile(
+                fid, dtype=self.dtype, count=count*self.channels)
+
+        #convert to the native byte order
+        samples = samples.astype(self.dtype.newbyteorder('='))
+
+        if self.channels > 1:
+            samples = samples.reshape([-1, self.channels])
+
+        return self.rate, samples
@@ -2,4 +2,5 @@
 this package contains the normalizer functions for database target normalization
 '''
 
-from . import aurora4, normalizer_factory, character, phones, gp
+from . import aurora4, normalizer_factory, character, phones, gp, charmap, \
+subword
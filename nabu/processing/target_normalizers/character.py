@@ -1,6 +1,8 @@
 '''@file character.py
 contains the character target normalizer'''
 
+from charmap import CharacterMap
+
 def normalize(transcription, alphabet):
     '''normalize a transcription
 
@@ -11,15 +13,30 @@ def normalize(transcription, alphabet):
         the normalized transcription as a string space seperated per
         character'''
 
-    #make the transcription lower case and put it into a list
-    normalized = list(transcription.lower())
+    return CharacterNormalizer(alphabet)(transcription)
+
+class CharacterNormalizer(object):
+    '''a normalizer for a fixed alphabet, the lookup tables are only built
+    once'''
+
+    def __init__(self, alphabet):
+        '''CharacterNormalizer constructor
+
+        Args:
+            alphabet: the alphabet as a list of labels
+        '''
+
+        self.charmap = CharacterMap(alphabet)
+
+    def __call__(self, transcription):
+        '''normalize a transcription
 
-    #replace the spaces with <space>
-    normalized = [character if character is not ' ' else '<space>'
-                  for character in normalized]
+        Args:
+            transcription: the transcription to be normalized as a string
 
-    #replace unknown characters with <unk>
-    normalized = [character if character in alphabet else '<unk>'
-                  for character in normalized]
+        Returns:
+            the normalized transcription as a string space seperated per
+            character'''
 
-    return ' '.join(normalized)
+        #make the transcription lower case and map the characters to labels
+        return self.charmap(transcription.lower())
@@ -0,0 +1,51 @@
+'''@file charmap.py
+contains the CharacterMap class'''
+
+class CharacterMap(dict):
+    '''maps the characters of a transcription to their labels
+
+    A character is mapped to itself if it is in the alphabet, a space is mapped
+    to <space> and unknown characters are mapped to <unk>. The label of a
+    character is only looked up the first time the character is seen.'''
+
+    def __init__(self, alphabet):
+        '''CharacterMap constructor
+
+        Args:
+            alphabet: the alphabet as a list of labels
+        '''
+
+        super(CharacterMap, self).__init__()
+        self.alphabet = set(alphabet)
+
+    def __missing__(self, character):
+        '''compute and store the label of a character that was not seen before
+
+        Args:
+            character: the character
+
+        Returns:
+            the label of the character'''
+
+        if character == ' ':
+            label = '<space>'
+        else:
+            label = character
+
+        if label not in self.alphabet:
+            label = '<unk>'
+
+        self[character] = label
+
+        return label
+
+    def __call__(self, transcription):
+        '''map the characters of a transcription to their labels
+
+        Args:
+            transcription: the transcription as a string
+
+        Returns:
+            the labels as a string space seperated per character'''
+
+        return ' '.join(map(self.__getitem__, transcription))
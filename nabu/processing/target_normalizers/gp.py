@@ -1,7 +1,8 @@
-'''@file aurora4.py
+'''@file gp.py
 contains the global phoneset target normalizer'''
 
 import unicodedata
+from charmap import CharacterMap
 
 def normalize(transcription, alphabet):
     '''normalize for the Global Phoneset database
@@ -13,20 +14,34 @@ def normalize(transcription, alphabet):
         the normalized transcription as a string space seperated per
         character'''
 
-    #remove accents
-    normalized = unicodedata.normalize(
-        form='NFKD',
-        unistr=transcription.decode('utf-8')).encode('ASCII', 'ignore')
+    return GpNormalizer(alphabet)(transcription)
 
-    normalized = list(normalized.lower())
+class GpNormalizer(object):
+    '''a normalizer for a fixed alphabet, the lookup tables are only built
+    once'''
 
+    def __init__(self, alphabet):
+        '''GpNormalizer constructor
 
-    #replace the spaces with <space>
-    normalized = [character if character is not ' ' else '<space>'
-                  for character in normalized]
+        Args:
+            alphabet: the alphabet as a list of labels
+        '''
 
-    #replace unknown characters with <unk>
-    normalized = [character if character in alphabet else '<unk>'
-                  for character in normalized]
+        self.charmap = CharacterMap(alphabet)
 
-    return ' '.join(normalized)
+    def __call__(self, transcription):
+        '''normalize a transcription
+
+        Args:
+            transcription: the transcription to be normalized as a string
+
+        Returns:
+            the normalized transcription as a string space seperated per
+            character'''
+
+        #remove accents
+        normalized = unicodedata.normalize(
+            'NFKD', transcription.decode('utf-8')).encode('ASCII', 'ignore')
+
+        #make the transcription lower case and map the characters to labels
+        return self.charmap(normalized.lower())
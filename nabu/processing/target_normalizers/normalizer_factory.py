@@ -2,7 +2,12 @@
 Contains the normalizer factory
 '''
 
-from . import character, aurora4, phones, gp
+from . import character, aurora4, phones, gp, subword
+
+#the options of the compiled normalizers that can be set in the normalizer
+#section of the processor config, the other normalizers only take the
+#alphabet
+OPTIONS = {'subword': ['merges']}
 
 def factory(normalizer):
     '''get a normalizer class
@@ -21,5 +26,45 @@ def factory(normalizer):
         return character.normalize
     elif normalizer == 'gp':
         return gp.normalize
+    elif normalizer == 'subword':
+        raise Exception(
+            'the subword normalizer needs a merge table, use compiled_factory')
     else:
         raise Exception('Undefined normalizer: %s' % normalizer)
+
+def compiled_factory(normalizer):
+    '''get a normalizer class, a normalizer object is created for a fixed
+    alphabet so its lookup tables are only built once
+
+    Args:
+        normalizer_type: the type of normalizer_type
+
+    Returns:
+        a normalizer class'''
+
+    if normalizer == 'aurora4':
+        return aurora4.Aurora4Normalizer
+    elif normalizer == 'phones':
+        return phones.PhonesNormalizer
+    elif normalizer == 'character':
+        return character.CharacterNormalizer
+    elif normalizer == 'gp':
+        return gp.GpNormalizer
+    elif normalizer == 'subword':
+        return subword.SubwordNormalizer
+    else:
+        raise Exception('Undefined normalizer: %s' % normalizer)
+
+def compiled_options(normalizer, options):
+    '''select the options that are passed to a compiled normalizer, the
+    options the normalizer does not take are left out
+
+    Args:
+        normalizer: the type of normalizer
+        options: a dictionary of options (e.g. from the normalizer section)
+
+    Returns:
+        a dictionary with the options the normalizer takes'''
+
+    return {key: value for key, value in options.items()
+            if key in OPTIONS.get(normalizer, [])}
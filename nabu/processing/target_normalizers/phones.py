@@ -12,3 +12,23 @@ def normalize(transcription, _):
         character'''
 
     return transcription
+
+class PhonesNormalizer(object):
+    '''a normalizer for phonetic transcriptions'''
+
+    def __init__(self, _):
+        '''PhonesNormalizer constructor'''
+
+        pass
+
+    def __call__(self, transcription):
+        '''normalize a phonetic transcription
+
+        Args:
+            transcription: the transcription to be normalized as a string
+
+        Returns:
+            the normalized transcription as a string space seperated per
+            character'''
+
+        return transcription
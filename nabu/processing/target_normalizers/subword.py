@@ -0,0 +1,258 @@
+'''@file subword.py
+contains the subword target normalizer, the words are split into subword units
+with byte pair encoding'''
+
+import heapq
+from collections import defaultdict
+
+#the marker of the last symbol of a word while merging
+END_OF_WORD = '</w>'
+
+#the marker of a subword unit that is not at the end of a word
+CONTINUATION = '@@'
+
+class SubwordNormalizer(object):
+    '''a normalizer that splits the words into subword units, the merge table
+    is read once and the segmentation of every word is only computed the first
+    time the word is seen
+
+    The units that are not at the end of a word end with @@, so the
+    transcription can be recovered by removing '@@ '. Subword units that are
+    not in the alphabet are split into characters and unknown characters are
+    mapped to <unk>.'''
+
+    def __init__(self, alphabet, merges):
+        '''SubwordNormalizer constructor
+
+        Args:
+            alphabet: the subword units as a list of labels
+            merges: the path to the merge table
+        '''
+
+        self.segmentation = SubwordMap(read_merges(merges), alphabet)
+
+    def __call__(self, transcription):
+        '''normalize a transcription
+
+        Args:
+            transcription: the transcription to be normalized as a string
+
+        Returns:
+            the normalized transcription as a string space seperated per
+            subword unit'''
+
+        #make the transcription lower case and split the words into units
+        return ' '.join(
+            map(self.segmentation.__getitem__, transcription.lower().split()))
+
+class SubwordMap(dict):
+    '''maps words to their subword units
+
+    The units of a word are only computed the first time the word is
+    seen.'''
+
+    def __init__(self, merges, alphabet):
+        '''SubwordMap constructor
+
+        Args:
+            merges: the merge table as a list of symbol pairs in the order
+                they were learned
+            alphabet: the subword units as a list of labels
+        '''
+
+        super(SubwordMap, self).__init__()
+        self.ranks = dict((pair, rank) for rank, pair in enumerate(merges))
+        self.alphabet = set(alphabet)
+
+    def __missing__(self, word):
+        '''compute and store the units of a word that was not seen before
+
+        Args:
+            word: the word
+
+        Returns:
+            the units of the word as a space seperated string'''
+
+        units = []
+        for symbol in segment(word, self.ranks):
+            unit = _unit(symbol)
+            if unit in self.alphabet:
+                units.append(unit)
+            else:
+                #split units that are not in the alphabet into characters
+                for character in _characters(symbol):
+                    units.append(character if character in self.alphabet
+                                 else '<unk>')
+
+        self[word] = ' '.join(units)
+
+        return self[word]
+
+def segment(word, ranks):
+    '''split a word into symbols by applying the merges in the order they
+    were learned
+
+    Args:
+        word: the word as a string
+        ranks: a dictionary mapping symbol pairs to their position in the merge
+            table
+
+    Returns:
+        the symbols as a list of strings, the last symbol ends with the end of
+        word marker'''
+
+    symbols = list(word[:-1]) + [word[-1] + END_OF_WORD]
+
+    while len(symbols) > 1:
+
+        #find the pair that was merged first
+        rank, pair = min(
+            (ranks.get(pair, len(ranks)), pair)
+            for pair in zip(symbols[:-1], symbols[1:]))
+        if rank == len(ranks):
+            break
+
+        symbols = _merge(symbols, pair)
+
+    return symbols
+
+def learn_merges(counts, num_merges):
+    '''learn a merge table from word counts, the most frequent pair of symbols
+    is merged until num_merges merges are learned
+
+    Args:
+        counts: a dictionary mapping the words to their number of occurences
+        num_merges: the number of merges
+
+    Returns:
+        the merge table as a list of symbol pairs'''
+
+    words = [list(word[:-1]) + [word[-1] + END_OF_WORD]
+             for word in counts if word]
+    wordcounts = [counts[word] for word in counts if word]
+
+    #the number of occurences of every pair and the words the pair occurs in
+    stats = defaultdict(int)
+    index = defaultdict(set)
+    for i, symbols in enumerate(words):
+        for pair in zip(symbols[:-1], symbols[1:]):
+            stats[pair] += wordcounts[i]
+            index[pair].add(i)
+
+    #a heap of the pair counts, entries whose count changed are skipped when
+    #they are popped
+    heap = [(-count, pair) for pair, count in stats.items()]
+    heapq.heapify(heap)
+
+    merges = []
+    while heap and len(merges) < num_merges:
+
+        count, pair = heapq.heappop(heap)
+        if -count != stats.get(pair) or not count:
+            continue
+
+        merges.append(pair)
+
+        changed = set()
+        for i in index.pop(pair):
+
+            #remove the pairs of the word, merge it and add the new pairs
+            symbols = words[i]
+            for old in zip(symbols[:-1], symbols[1:]):
+                stats[old] -= wordcounts[i]
+                changed.add(old)
+            symbols = words[i] = _merge(symbols, pair)
+            for new in zip(symbols[:-1], symbols[1:]):
+                stats[new] += wordcounts[i]
+                index[new].add(i)
+                changed.add(new)
+
+        del stats[pair]
+        for changed_pair in changed:
+            if changed_pair == pair:
+                continue
+            if stats[changed_pair] > 0:
+                heapq.heappush(heap, (-stats[changed_pair], changed_pair))
+            else:
+                del stats[changed_pair]
+
+    return merges
+
+def subword_units(words, merges):
+    '''get the subword units the words are split into, the units of the
+    characters are included so unseen words can be split into characters
+
+    Args:
+        words: an iterable of words
+        merges: the merge table as a list of symbol pairs
+
+    Returns:
+        the units as a set of labels'''
+
+    ranks = dict((pair, rank) for rank, pair in enumerate(merges))
+
+    units = set()
+    for word in words:
+        if word:
+            for symbol in segment(word, ranks):
+                units.add(_unit(symbol))
+                units.update(_characters(symbol))
+
+    return units
+
+def read_merges(filename):
+    '''read a merge table
+
+    Args:
+        filename: the path to the merge table, a file with a space seperated
+            pair of symbols per line
+
+    Returns:
+        the merge table as a list of symbol pairs'''
+
+    with open(filename) as fid:
+        return [tuple(line.split()) for line in fid if line.strip()]
+
+def write_merges(merges, filename):
+    '''write a merge table
+
+    Args:
+        merges: the merge table as a list of symbol pairs
+        filename: the path to the merge table'''
+
+    with open(filename, 'w') as fid:
+        for pair in merges:
+            fid.write('%s %s\n' % pair)
+
+def _merge(symbols, pair):
+    '''merge all occurences of a pair in a list of symbols'''
+
+    merged = []
+    i = 0
+    while i < len(symbols):
+        if (i < len(symbols) - 1 and symbols[i] == pair[0] and
+                symbols[i+1] == pair[1]):
+            merged.append(symbols[i] + symbols[i+1])
+            i += 2
+        else:
+            merged.append(symbols[i])
+            i += 1
+
+    return merged
+
+def _unit(symbol):
+    '''the subword unit of a symbol'''
+
+    if symbol.endswith(END_OF_WORD):
+        return symbol[:-len(END_OF_WORD)]
+    else:
+        return symbol + CONTINUATION
+
+def _characters(symbol):
+    '''the units of the characters of a symbol'''
+
+    if symbol.endswith(END_OF_WORD):
+        characters = symbol[:-len(END_OF_WORD)]
+        return [c + CONTINUATION for c in characters[:-1]] + [characters[-1]]
+    else:
+        return [c + CONTINUATION for c in symbol]
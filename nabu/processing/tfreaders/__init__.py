@@ -2,4 +2,6 @@
 contains readers that are used for reading and processing tfRecord files'''
 
 from . import tfreader, tfreader_factory, audio_feature_reader, string_reader,\
-binary_reader, alignment_reader
+binary_reader, alignment_reader, encoded_string_reader,\
+flat_reader, kaldi_alignment_reader,\
+raw_audio_reader
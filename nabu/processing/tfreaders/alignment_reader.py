@@ -41,6 +41,37 @@ class AlignmentReader(tfreader.TfReader):
 
         return metadata
 
+    def read_batch(self, pointers, name=None):
+        '''read the alignments of a batch of pointers, the alignments are
+        padded to the longest sequence in the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        return self._read_arrays(pointers, tf.int32, [], name=name)
+
+    def read_array(self, pointer):
+        '''read the alignments of an example outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the alignments as a numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+
+        return np.frombuffer(
+            example.features.feature['data'].bytes_list.value[0],
+            dtype=np.int32)
+
     def _create_features(self):
         '''
             creates the information about the features
@@ -48,8 +48,63 @@ class AudioFeatureReader(tfreader.TfReader):
                     raise Exception(
                         'all audio feature reader dimensions must be the same')
 
+        #read the codec the features are stored with, data that was written
+        #without codec is stored as float32
+        codecs = []
+        for datadir in datadirs:
+            if os.path.exists(os.path.join(datadir, 'codec')):
+                with open(os.path.join(datadir, 'codec')) as fid:
+                    codecs.append(fid.read().strip())
+            else:
+                codecs.append('float32')
+        if len(set(codecs)) > 1:
+            raise Exception(
+                'all audio feature reader codecs must be the same')
+        metadata['codec'] = codecs[0]
+
         return metadata
 
+    def read_batch(self, pointers, name=None):
+        '''read the features of a batch of pointers, the features are padded
+        to the longest sequence in the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length x dim] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        return self._read_arrays(
+            pointers, tf.float32, [self.metadata['dim']], name=name)
+
+    def read_array(self, pointer):
+        '''read the features of an example outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the features as a [seq_length x dim] float32 numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+        feature = example.features.feature
+
+        data = feature['data'].bytes_list.value[0]
+        if self.metadata['codec'] == 'int8':
+            data = np.frombuffer(data, dtype=np.int8).astype(np.float32)
+            data = data.reshape([-1, self.metadata['dim']])
+            data *= np.frombuffer(
+                feature['scale'].bytes_list.value[0], dtype=np.float32)
+        else:
+            data = np.frombuffer(data, dtype=self.metadata['codec'])
+            data = data.astype(np.float32).reshape([-1, self.metadata['dim']])
+
+        return data
+
     def _create_features(self):
         '''
             creates the information about the features
@@ -59,7 +114,12 @@ class AudioFeatureReader(tfreader.TfReader):
                 and SparseFeature values
         '''
 
-        return {'data': tf.FixedLenFeature([], dtype=tf.string)}
+        features = {'data': tf.FixedLenFeature([], dtype=tf.string)}
+
+        if self.metadata['codec'] == 'int8':
+            features['scale'] = tf.FixedLenFeature([], dtype=tf.string)
+
+        return features
 
     def _process_features(self, features):
         '''process the read features
@@ -71,8 +131,16 @@ class AudioFeatureReader(tfreader.TfReader):
             a pair of tensor and sequence length
         '''
 
-        data = tf.decode_raw(features['data'], tf.float32)
-        data = tf.reshape(data, [-1, self.metadata['dim']])
+        if self.metadata['codec'] == 'int8':
+            #dequantize the features with the scale of every dimension
+            data = tf.cast(tf.decode_raw(features['data'], tf.int8), tf.float32)
+            data = tf.reshape(data, [-1, self.metadata['dim']])
+            data *= tf.decode_raw(features['scale'], tf.float32)
+        else:
+            data = tf.decode_raw(
+                features['data'], tf.as_dtype(self.metadata['codec']))
+            data = tf.cast(data, tf.float32)
+            data = tf.reshape(data, [-1, self.metadata['dim']])
         sequence_length = tf.shape(data)[0]
 
         return data, sequence_length
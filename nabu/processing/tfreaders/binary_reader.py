@@ -41,6 +41,37 @@ class BinaryReader(tfreader.TfReader):
 
         return metadata
 
+    def read_batch(self, pointers, name=None):
+        '''read the sequences of a batch of pointers, the sequences are
+        padded to the longest sequence in the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        return self._read_arrays(pointers, tf.bool, [], name=name)
+
+    def read_array(self, pointer):
+        '''read a sequence outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the sequence as a boolean numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+
+        return np.frombuffer(
+            example.features.feature['data'].bytes_list.value[0],
+            dtype=np.uint8).astype(np.bool)
+
     def _create_features(self):
         '''
             creates the information about the features
@@ -0,0 +1,94 @@
+'''@file encoded_string_reader.py
+contains the EncodedStringReader class'''
+
+import os
+import numpy as np
+import tensorflow as tf
+import string_reader
+
+class EncodedStringReader(string_reader.StringReader):
+    '''a reader for text data that was encoded in the data preperation'''
+
+    def _read_metadata(self, datadirs):
+        '''read the metadata for the reader (writen by the processor)
+
+            Args:
+                datadirs: the directories where the metadata was stored as a
+                    list of strings
+
+            Returns:
+                the metadata as a dictionary
+        '''
+
+        metadata = super(EncodedStringReader, self)._read_metadata(datadirs)
+
+        #read the integer type of the encoded strings, the alphabets are the
+        #same so the types are the same
+        with open(os.path.join(datadirs[0], 'dtype')) as fid:
+            metadata['dtype'] = tf.as_dtype(fid.read().strip())
+
+        return metadata
+
+    def read_batch(self, pointers, name=None):
+        '''read the encoded strings of a batch of pointers, the strings are
+        padded to the maximal length
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        return self._read_arrays(
+            pointers, tf.int32, [], self.metadata['max_length'], name)
+
+    def read_array(self, pointer):
+        '''read an encoded string outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the encoded string as an int32 numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+
+        return np.frombuffer(
+            example.features.feature['data'].bytes_list.value[0],
+            dtype=self.metadata['dtype'].as_numpy_dtype).astype(np.int32)
+
+    def _create_features(self):
+        '''
+            creates the information about the features
+
+            Returns:
+                A dict mapping feature keys to FixedLenFeature, VarLenFeature,
+                and SparseFeature values
+        '''
+
+        return {'data': tf.FixedLenFeature([], dtype=tf.string)}
+
+    def _process_features(self, features):
+        '''process the read features
+
+        features:
+            A dict mapping feature keys to Tensor and SparseTensor values
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        data = tf.cast(
+            tf.decode_raw(features['data'], self.metadata['dtype']), tf.int32)
+        sequence_length = tf.shape(data)[0]
+
+        #pad the data untill the maximal length
+        paddings = [[0, self.metadata['max_length'] - sequence_length]]
+        data = tf.pad(data, paddings)
+        data.set_shape([self.metadata['max_length']])
+
+        return data, sequence_length
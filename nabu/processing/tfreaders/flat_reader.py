@@ -0,0 +1,127 @@
+'''@file flat_reader.py
+contains the FlatReader class'''
+
+import os
+import mmap
+import threading
+import numpy as np
+import tensorflow as tf
+import audio_feature_reader
+
+class FlatReader(audio_feature_reader.AudioFeatureReader):
+    '''reader for audio features in a flat store (see FlatWriter)
+
+    The stores are memory mapped and the features are sliced from them, so
+    repeated epochs are read from the page cache without parsing. The
+    features can also be read by name with read.'''
+
+    def __init__(self, datadirs):
+        '''FlatReader constructor
+
+        Args:
+            datadirs: the directories where the metadata was stored as a list
+                of strings
+        '''
+
+        super(FlatReader, self).__init__(datadirs)
+
+        self.datadirs = datadirs
+        self.dtype = np.dtype(self.metadata['codec'])
+
+        #the memory mapped stores and a lock to map them
+        self.files = dict()
+        self.lock = threading.Lock()
+
+        #the pointers of all utterances, only read if they are requested by
+        #name
+        self.pointers = None
+
+    def read_pointer(self, pointer, name=None):
+        '''read the features a pointer points to
+
+        Args:
+            pointer: a scalar string tensor containing a pointer to an array
+                in the form store:offset:rows
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        with tf.name_scope(name or type(self).__name__):
+
+            data = tf.py_func(self._read_array, [pointer], tf.float32)
+            data.set_shape([None, self.metadata['dim']])
+            sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
+
+    def read(self, name):
+        '''read the features of an utterance
+
+        Args:
+            name: the name of the utterance
+
+        Returns:
+            the features as a [seq_length x dim] numpy array
+        '''
+
+        if self.pointers is None:
+            self.pointers = dict()
+            for datadir in self.datadirs:
+                with open(os.path.join(datadir, 'pointers.scp')) as fid:
+                    for line in fid:
+                        utt, pointer = line.strip().split('\t')
+                        self.pointers[utt] = pointer
+
+        return self.read_array(self.pointers[name])
+
+    def read_array(self, pointer):
+        '''read the features of an example outside of the graph
+
+        Args:
+            pointer: the pointer to the features in the form store:offset:rows
+
+        Returns:
+            the features as a [rows x dim] numpy array
+        '''
+
+        return self._read_array(pointer)
+
+    def _read_array(self, pointer):
+        '''read an array from a store
+
+        Args:
+            pointer: the pointer to the array in the form store:offset:rows
+
+        Returns:
+            the array as a [rows x dim] numpy array
+        '''
+
+        filename, offset, rows = pointer.rsplit(':', 2)
+
+        with self.lock:
+
+            #keep the stores mapped
+            if filename not in self.files:
+                with open(filename, 'rb') as fid:
+                    self.files[filename] = mmap.mmap(
+                        fid.fileno(), 0, access=mmap.ACCESS_READ)
+            store = self.files[filename]
+
+        data = np.frombuffer(
+            store, dtype=self.dtype, count=int(rows)*self.metadata['dim'],
+            offset=int(offset))
+
+        return data.reshape([int(rows), self.metadata['dim']]).astype(
+            np.float32, copy=False)
+
+    def _create_features(self):
+        '''the flat store has no features'''
+
+        return None
+
+    def _process_features(self, features):
+        '''the flat store has no features'''
+
+        return features
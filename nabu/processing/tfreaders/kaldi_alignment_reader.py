@@ -0,0 +1,96 @@
+'''@file kaldi_alignment_reader.py
+contains the KaldiAlignmentReader class'''
+
+import mmap
+import threading
+import numpy as np
+import tensorflow as tf
+import alignment_reader
+
+class KaldiAlignmentReader(alignment_reader.AlignmentReader):
+    '''reader for integer vectors in binary kaldi archives (e.g. alignments),
+    the archives are memory mapped'''
+
+    def __init__(self, datadirs):
+        '''KaldiAlignmentReader constructor
+
+        Args:
+            datadirs: the directories where the metadata was stored as a list
+                of strings
+        '''
+
+        super(KaldiAlignmentReader, self).__init__(datadirs)
+
+        #the memory mapped archives and a lock to map them
+        self.files = dict()
+        self.lock = threading.Lock()
+
+    def read_pointer(self, pointer, name=None):
+        '''read the alignments a pointer points to
+
+        Args:
+            pointer: a scalar string tensor containing a pointer to a vector
+                in the form ark:offset:rows
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        with tf.name_scope(name or type(self).__name__):
+
+            data = tf.py_func(self._read_vector, [pointer], tf.int32)
+            data.set_shape([None])
+            sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
+
+    def read_array(self, pointer):
+        '''read a vector outside of the graph
+
+        Args:
+            pointer: the pointer to the vector in the form ark:offset:rows
+
+        Returns:
+            the vector as a numpy array
+        '''
+
+        return self._read_vector(pointer)
+
+    def _read_vector(self, pointer):
+        '''read an integer vector from an archive
+
+        Args:
+            pointer: the pointer to the vector in the form ark:offset:rows
+
+        Returns:
+            the vector as a numpy array
+        '''
+
+        filename, offset, rows = pointer.rsplit(':', 2)
+
+        with self.lock:
+
+            #keep the archives mapped
+            if filename not in self.files:
+                with open(filename, 'rb') as fid:
+                    self.files[filename] = mmap.mmap(
+                        fid.fileno(), 0, access=mmap.ACCESS_READ)
+            archive = self.files[filename]
+
+        #every element is preceded by its size
+        data = np.frombuffer(
+            archive, dtype=[('size', 'i1'), ('value', '<i4')],
+            count=int(rows), offset=int(offset))
+
+        return data['value'].astype(np.int32)
+
+    def _create_features(self):
+        '''the archives have no features'''
+
+        return None
+
+    def _process_features(self, features):
+        '''the archives have no features'''
+
+        return features
@@ -0,0 +1,177 @@
+'''@file raw_audio_reader.py
+contains the RawAudioReader class'''
+
+import os
+import threading
+import numpy as np
+from six.moves import configparser
+import tensorflow as tf
+import tfreader
+from nabu.processing.processors import audio_processor
+from nabu.processing.feature_computers import sigproc
+
+class RawAudioReader(tfreader.TfReader):
+    '''reader for 16 bit audio samples, the features are computed from the
+    samples in the input pipeline with the same computations as the audio
+    processor'''
+
+    def __init__(self, datadirs, feature_config=None):
+        '''RawAudioReader constructor
+
+        Args:
+            datadirs: the directories where the metadata was stored as a list
+                of strings
+            feature_config: the path to the configuration of the audio
+                processor that is used to compute the features, if None the
+                configuration that was used in the data preperation is used
+        '''
+
+        if feature_config is None:
+            feature_config = os.path.join(datadirs[0], 'feature_processor.cfg')
+
+        parsed_cfg = configparser.ConfigParser()
+        parsed_cfg.read(feature_config)
+        self.processor = audio_processor.AudioProcessor(parsed_cfg)
+
+        #the running and window normalization have a state that is updated
+        #by every utterance, so those features are computed one utterance at
+        #a time
+        self.processor_lock = threading.Lock()
+
+        super(RawAudioReader, self).__init__(datadirs)
+
+    def _read_metadata(self, datadirs):
+        '''read the metadata for the reader (writen by the processor), the
+        sequence lengths are converted from samples to frames
+
+            Args:
+                datadirs: the directories where the metadata was stored as a
+                    list of strings
+
+            Returns:
+                the metadata as a dictionary
+        '''
+
+        metadata = dict()
+
+        #read the sampling rates
+        rates = []
+        for datadir in datadirs:
+            with open(os.path.join(datadir, 'rate')) as fid:
+                rates.append(int(fid.read()))
+        if len(set(rates)) > 1:
+            raise Exception(
+                'all raw audio reader sampling rates must be the same')
+        metadata['rate'] = rates[0]
+
+        #the number of frames for every number of samples
+        winlen = float(self.processor.comp.conf['winlen'])
+        winstep = float(self.processor.comp.conf['winstep'])
+        numframes = lambda siglen: sigproc.numframes(
+            siglen, metadata['rate'], winlen, winstep)
+
+        #read the maximum lengths
+        max_lengths = []
+        for datadir in datadirs:
+            with open(os.path.join(datadir, 'max_length')) as fid:
+                max_lengths.append(numframes(int(fid.read())))
+        metadata['max_length'] = max(max_lengths)
+
+        #read the sequence length histograms and convert them to frames
+        metadata['sequence_length_histogram'] = np.zeros(
+            [metadata['max_length'] + 1])
+        for datadir in datadirs:
+            with open(os.path.join(datadir,
+                                   'sequence_length_histogram.npy')) as fid:
+                histogram = np.load(fid)
+            for siglen in np.nonzero(histogram)[0]:
+                metadata['sequence_length_histogram'][numframes(siglen)] += (
+                    histogram[siglen])
+
+        metadata['dim'] = self.processor.dim
+
+        return metadata
+
+    def _create_features(self):
+        '''
+            creates the information about the features
+
+            Returns:
+                A dict mapping feature keys to FixedLenFeature, VarLenFeature,
+                and SparseFeature values
+        '''
+
+        return {'data': tf.FixedLenFeature([], dtype=tf.string)}
+
+    def _process_features(self, features):
+        '''process the read features
+
+        features:
+            A dict mapping feature keys to Tensor and SparseTensor values
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        samples = tf.decode_raw(features['data'], tf.int16)
+
+        data = tf.py_func(self._compute_features, [samples], tf.float32)
+        data.set_shape([None, self.metadata['dim']])
+        sequence_length = tf.shape(data)[0]
+
+        return data, sequence_length
+
+    def read_batch(self, pointers, name=None):
+        '''read the audio of a batch of pointers and compute the features, the
+        features are padded to the longest sequence in the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length x dim] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        return self._read_arrays(
+            pointers, tf.float32, [self.metadata['dim']], name=name)
+
+    def read_array(self, pointer):
+        '''read the audio and compute the features outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the features as a [seq_length x dim] float32 numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+        samples = np.frombuffer(
+            example.features.feature['data'].bytes_list.value[0],
+            dtype=np.int16)
+
+        return self._compute_features(samples)
+
+    def _compute_features(self, samples):
+        '''compute the features of an utterance
+
+        Args:
+            samples: the audio samples as a numpy array
+
+        Returns:
+            the features as a [seq_length x dim] float32 numpy array
+        '''
+
+        #utterance normalization has no state so the features can be
+        #computed by all reader threads at the same time
+        if self.processor.cmvn in ['utterance', 'none']:
+            features = self.processor.compute_features(
+                self.metadata['rate'], samples)
+        else:
+            with self.processor_lock:
+                features = self.processor.compute_features(
+                    self.metadata['rate'], samples)
+
+        return features.astype(np.float32)
@@ -56,8 +56,99 @@ class StringReader(tfreader.TfReader):
 
         metadata['alphabet'] = tf.constant(alphabet)
 
+        #the encoding of the labels for reading outside of the graph
+        metadata['encoding'] = dict(
+            (label, i - 1) for i, label in reversed(list(enumerate(alphabet))))
+
         return metadata
 
+    def read_batch(self, pointers, name=None):
+        '''read the strings of a batch of pointers, the examples are parsed
+        together and the strings are split and encoded once for the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x max_length] tensor and [batch_size]
+            sequence lengths
+        '''
+
+        #cached strings are encoded once with read_array
+        if self.cache is not None:
+            return self._read_arrays(
+                pointers, tf.int32, [], self.metadata['max_length'], name)
+
+        with tf.name_scope(name or type(self).__name__):
+
+            #read the records and parse them
+            serialized = tf.py_func(self._read_records, [pointers], tf.string)
+            serialized.set_shape([None])
+            features = tf.parse_example(serialized, self.features)
+
+            #split the data strings, the strings are padded with the
+            #nonesymbol
+            splitstrings = tf.string_split(features['data'], ' ')
+            sequence_length = tf.sparse_reduce_sum(tf.SparseTensor(
+                splitstrings.indices,
+                tf.ones_like(splitstrings.values, dtype=tf.int32),
+                splitstrings.dense_shape), axis=1)
+            sequence_length.set_shape([None])
+            splitstrings = tf.sparse_tensor_to_dense(splitstrings, '')
+
+            #encode the strings by looking up the characters in the alphabet
+            found = tf.equal(tf.expand_dims(splitstrings, 2),
+                             self.metadata['alphabet'])
+            data = tf.argmax(tf.cast(found, tf.int32), 2)
+            data = tf.cast(data, tf.int32) - 1
+
+            #the padding is zero like the padding of a single string
+            mask = tf.sequence_mask(sequence_length, tf.shape(data)[1])
+            data = tf.where(mask, data, tf.zeros_like(data))
+
+            assert_op = tf.assert_equal(
+                tf.logical_or(tf.reduce_any(found, 2), tf.logical_not(mask)),
+                True, message='not all string elements found in alphabet')
+
+            with tf.control_dependencies([assert_op]):
+
+                #pad the data untill the maximal length
+                padding = self.metadata['max_length'] - tf.shape(data)[1]
+                data = tf.pad(data, [[0, 0], [0, padding]])
+                data.set_shape([None, self.metadata['max_length']])
+
+        return data, sequence_length
+
+    def padded_length(self):
+        '''the strings are always padded to the maximal length
+
+        Returns:
+            the maximal length
+        '''
+
+        return self.metadata['max_length']
+
+    def read_array(self, pointer):
+        '''read and encode a string outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the encoded string as an int32 numpy array
+        '''
+
+        example = tf.train.Example.FromString(self._read_record(pointer))
+        data = example.features.feature['data'].bytes_list.value[0]
+
+        encoding = self.metadata['encoding']
+        labels = [label for label in data.split(' ') if label]
+        if not all(label in encoding for label in labels):
+            raise Exception('not all string elements found in alphabet')
+
+        return np.array([encoding[label] for label in labels], dtype=np.int32)
+
     def _create_features(self):
         '''
             creates the information about the features
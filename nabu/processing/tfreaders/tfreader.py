@@ -1,9 +1,16 @@
 '''@file tfreader.py
 contains the TfReader class'''
 
+import struct
+import threading
+from collections import OrderedDict
 from abc import ABCMeta, abstractmethod, abstractproperty
+import numpy as np
 import tensorflow as tf
 
+#the maximal number of shards that are kept open by a reader
+MAX_OPEN_SHARDS = 16
+
 class TfReader(object):
     '''class for reading tfrecord files and processing them'''
 
@@ -23,15 +30,36 @@ class TfReader(object):
         #create the features object
         self.features = self._create_features()
 
-        #create a reader
-        self.reader = tf.TFRecordReader()
+        #the open record files with a lock for every file, from the least to
+        #the most recently used, and a lock to open them. The records of
+        #different files can be read in parallel
+        self.shards = OrderedDict()
+        self.shard_lock = threading.Lock()
 
+        #the corpus cache the decoded examples are kept in, None if the
+        #examples are read every time
+        self.cache = None
 
     def __call__(self, queue, name=None):
         '''read all data from the queue
 
         Args:
-            queue: a queue containing filenames of tf record files
+            queue: a queue containing pointers to records in the form
+                shard:offset
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        return self.read_pointer(queue.dequeue(), name)
+
+    def read_pointer(self, pointer, name=None):
+        '''read the data a pointer points to
+
+        Args:
+            pointer: a scalar string tensor containing a pointer to a record
+                in the form shard:offset
             name: the name of the operation
 
         Returns:
@@ -39,8 +67,10 @@ class TfReader(object):
         '''
         with tf.name_scope(name or type(self).__name__):
 
-            #read all the elements in the queue
-            _, serialized = self.reader.read(queue)
+            #read the record the pointer points to
+            serialized = tf.py_func(
+                self._read_record, [pointer], tf.string)
+            serialized.set_shape([])
 
             #parse the serialized strings into features
             features = tf.parse_single_example(serialized, self.features)
@@ -50,6 +80,192 @@ class TfReader(object):
 
         return processed
 
+    def read_cached(self, pointer, name=None):
+        '''read the data a pointer points to through the corpus cache, the
+        example is decoded with read_array the first time it is read
+
+        Args:
+            pointer: a scalar string tensor containing a pointer
+            name: the name of the operation
+
+        Returns:
+            a pair of tensor and sequence length
+        '''
+
+        data, sequence_length = self.read_batch(
+            tf.expand_dims(pointer, 0), name)
+
+        return data[0], sequence_length[0]
+
+    def read_batch(self, pointers, name=None):
+        '''read the data of a batch of pointers, the records are read and
+        decoded together and the data is padded once for the batch
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x ...] tensor and [batch_size] sequence
+            lengths
+        '''
+
+        raise Exception('%s can not read batches' % type(self).__name__)
+
+    def padded_length(self):
+        '''the length every example is padded to when it is read
+
+        Returns:
+            the padded length, None if the examples are padded to the longest
+            sequence in the batch
+        '''
+
+        return None
+
+    def _read_arrays(self, pointers, dtype, shape, max_length=None,
+                     name=None):
+        '''read a batch of pointers with read_array in a single operation
+
+        Args:
+            pointers: a [batch_size] string tensor containing the pointers
+            dtype: the tensorflow type of the data
+            shape: the shape of the data without the time dimension
+            max_length: the length the data is padded to, if None the data is
+                padded to the longest sequence in the batch
+            name: the name of the operation
+
+        Returns:
+            a pair of [batch_size x ...] tensor and [batch_size] sequence
+            lengths
+        '''
+
+        def read(pointers):
+            '''read and pad the arrays'''
+
+            arrays = [self._read_cached_array(pointer) for pointer in pointers]
+            lengths = np.array([a.shape[0] for a in arrays], dtype=np.int32)
+            length = max_length
+            if length is None:
+                length = lengths.max() if arrays else 0
+            data = np.zeros([len(arrays), length] + shape,
+                            dtype=dtype.as_numpy_dtype)
+            for i, array in enumerate(arrays):
+                data[i, :array.shape[0]] = array
+
+            return data, lengths
+
+        with tf.name_scope(name or type(self).__name__):
+
+            data, sequence_length = tf.py_func(
+                read, [pointers], [dtype, tf.int32])
+            data.set_shape([None, max_length] + shape)
+            sequence_length.set_shape([None])
+
+        return data, sequence_length
+
+    def _read_cached_array(self, pointer):
+        '''read an example with read_array, if the reader has a cache the
+        example is only read the first time
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the data as a numpy array
+        '''
+
+        if self.cache is None:
+            return self.read_array(pointer)
+
+        key = (id(self), pointer)
+        array = self.cache.get(key)
+        if array is None:
+            array = self.read_array(pointer)
+            self.cache.put(key, array)
+
+        return array
+
+    def _read_records(self, pointers):
+        '''read a batch of serialized examples
+
+        Args:
+            pointers: the pointers to the records
+
+        Returns:
+            the serialized examples as a numpy array of strings
+        '''
+
+        return np.array([self._read_record(pointer) for pointer in pointers],
+                        dtype=object)
+
+    def _read_record(self, pointer):
+        '''read a serialized example from a record file
+
+        Args:
+            pointer: the pointer to the record in the form shard:offset, if no
+                offset is given the record is the first in the file
+
+        Returns:
+            the serialized example
+        '''
+
+        filename, offset = split_pointer(pointer)
+
+        #files without an offset contain a single record so they are opened
+        #every time
+        if offset is None:
+            with open(filename, 'rb') as fid:
+                return _read_record_at(fid, 0, pointer)
+
+        #the file can be closed by another reader thread between getting it
+        #and locking it, in that case it is opened again
+        while True:
+            fid, lock = self._open_shard(filename)
+            with lock:
+                if not fid.closed:
+                    return _read_record_at(fid, offset, pointer)
+
+    def _open_shard(self, filename):
+        '''get the open record file of a shard, the most recently used shards
+        are kept open
+
+        Args:
+            filename: the name of the record file
+
+        Returns:
+            the open file and the lock that must be held to read from it
+        '''
+
+        evicted = None
+        with self.shard_lock:
+            if filename in self.shards:
+                shard = self.shards.pop(filename)
+            else:
+                if len(self.shards) >= MAX_OPEN_SHARDS:
+                    evicted = self.shards.popitem(last=False)[1]
+                shard = (open(filename, 'rb'), threading.Lock())
+            self.shards[filename] = shard
+
+        #wait until the reads from the least recently used shard are done
+        #before closing it
+        if evicted is not None:
+            with evicted[1]:
+                evicted[0].close()
+
+        return shard
+
+    def read_array(self, pointer):
+        '''read an example outside of the graph
+
+        Args:
+            pointer: the pointer to the example
+
+        Returns:
+            the data as a numpy array
+        '''
+
+        raise Exception('%s can not read arrays' % type(self).__name__)
+
     @abstractmethod
     def _read_metadata(self, datadirs):
         '''read the metadata for the reader (writen by the processor)
@@ -82,3 +298,77 @@ class TfReader(object):
         Returns:
             a pair of tensor and sequence length
         '''
+
+def split_pointer(pointer):
+    '''split a pointer into the file and the offset
+
+    Args:
+        pointer: the pointer in the form file:offset or file
+
+    Returns:
+        - the filename
+        - the offset as an integer, None if the pointer contains no offset
+    '''
+
+    split = pointer.rsplit(':', 1)
+    if len(split) == 2 and split[1].isdigit():
+        return split[0], int(split[1])
+    else:
+        return pointer, None
+
+def _read_record_at(fid, offset, pointer):
+    '''read a serialized example from an open record file
+
+    Args:
+        fid: the open record file
+        offset: the offset of the record in the file
+        pointer: the pointer to the record, used in the error messages
+
+    Returns:
+        the serialized example
+    '''
+
+    #a record consists of a length (8 bytes), a length crc (4 bytes),
+    #the data and a data crc (4 bytes)
+    #only the crc of the length is checked, computing the crc of the data
+    #in python is too slow
+    fid.seek(offset)
+    header = fid.read(12)
+    if len(header) < 12:
+        raise Exception('the record at %s is truncated' % pointer)
+    length, length_crc = struct.unpack('<QI', header)
+    if length_crc != _masked_crc(header[:8]):
+        raise Exception('the record at %s is corrupt, the crc of its '
+                        'length does not match' % pointer)
+    serialized = fid.read(length)
+    if len(serialized) != length:
+        raise Exception('the record at %s is truncated' % pointer)
+
+    return serialized
+
+def _crc_table():
+    '''the lookup table of the crc32c (Castagnoli) checksum'''
+
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0x82F63B78
+            else:
+                crc >>= 1
+        table.append(crc)
+
+    return table
+
+CRC_TABLE = _crc_table()
+
+def _masked_crc(data):
+    '''the masked crc32c of a string as it is stored in a TFRecord file'''
+
+    crc = 0xFFFFFFFF
+    for char in data:
+        crc = CRC_TABLE[(crc ^ ord(char)) & 0xFF] ^ (crc >> 8)
+    crc ^= 0xFFFFFFFF
+
+    return (((crc >> 15) | (crc << 17)) + 0xA282EAD8) & 0xFFFFFFFF
@@ -2,7 +2,8 @@
 contains the tfreader factory'''
 
 from . import audio_feature_reader, string_reader, binary_reader, \
-alignment_reader
+alignment_reader, encoded_string_reader, flat_reader, kaldi_alignment_reader, \
+raw_audio_reader
 
 def factory(datatype):
     '''factory for tfreaders
@@ -22,5 +23,16 @@ def factory(datatype):
         return binary_reader.BinaryReader
     elif datatype == 'alignment':
         return alignment_reader.AlignmentReader
+    elif datatype == 'encoded_string':
+        return encoded_string_reader.EncodedStringReader
+    elif datatype == 'flat_audio_feature':
+        return flat_reader.FlatReader
+    elif datatype == 'kaldi_feature':
+        #the matrices in a kaldi archive are stored like a flat store
+        return flat_reader.FlatReader
+    elif datatype == 'kaldi_alignment':
+        return kaldi_alignment_reader.KaldiAlignmentReader
+    elif datatype == 'raw_audio':
+        return raw_audio_reader.RawAudioReader
     else:
         raise Exception('unknown data type: %s' % datatype)
@@ -2,4 +2,5 @@
 contains the objects for writing tensorflow record files'''
 
 from . import tfwriter, array_writer, string_writer, tfwriter_factory,\
-binary_writer, alignment_writer
+binary_writer, alignment_writer, encoded_string_writer,\
+flat_writer, pointer_writer, raw_audio_writer
@@ -1,12 +1,42 @@
 '''@file array_writer.py
 contains the ArrayWriter class'''
 
+import os
 import numpy as np
 import tensorflow as tf
 import tfwriter
 
+#the codecs that can be used to store the arrays, int16 stores integer
+#arrays (e.g. 16 bit audio) as they are
+CODECS = ['float32', 'float16', 'int8', 'int16']
+
 class ArrayWriter(tfwriter.TfWriter):
-    '''a TfWriter to write numpy arrays'''
+    '''a TfWriter to write numpy arrays
+
+    The arrays can be stored as float32, float16 or int8. For int8 every
+    dimension (the last axis) is scaled so its largest absolute value maps to
+    127, the scales are stored with the array. The codec is written to the
+    codec file in the data directory.'''
+
+    def __init__(self, datadir, codec='float32', shard_size=2**28):
+        '''ArrayWriter constructor
+
+        Args:
+            datadir: the directory where the data will be written
+            codec: the codec used to store the arrays, one of float32, float16
+                or int8
+            shard_size: the size of a record file in bytes after which a new
+                file is started
+        '''
+
+        if codec not in CODECS:
+            raise Exception('unknown codec: %s' % codec)
+
+        super(ArrayWriter, self).__init__(datadir, shard_size=shard_size)
+
+        self.codec = codec
+        with open(os.path.join(datadir, 'codec'), 'w') as fid:
+            fid.write(codec)
 
     def _get_example(self, data):
         '''write data to a file
@@ -16,12 +46,28 @@ class ArrayWriter(tfwriter.TfWriter):
 
         shape_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
             value=[np.array(data.astype(np.int32).shape).tostring()]))
-        data_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
-            value=[data.reshape([-1]).astype(np.float32).tostring()]))
+
+        feature = {'shape': shape_feature}
+
+        if self.codec == 'int8':
+            #scale every dimension to the int8 range, an empty array has no
+            #range so it is not scaled
+            if data.size:
+                scale = np.abs(data.reshape([-1, data.shape[-1]])).max(0)/127
+                scale[scale == 0] = 1
+            else:
+                scale = np.ones(data.shape[-1])
+            encoded = np.round(data/scale).astype(np.int8)
+            feature['scale'] = tf.train.Feature(
+                bytes_list=tf.train.BytesList(
+                    value=[scale.astype(np.float32).tostring()]))
+        else:
+            encoded = data.astype(self.codec)
+
+        feature['data'] = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[encoded.reshape([-1]).tostring()]))
 
         #create the example proto
-        example = tf.train.Example(features=tf.train.Features(feature={
-            'shape': shape_feature,
-            'data': data_feature}))
+        example = tf.train.Example(features=tf.train.Features(feature=feature))
 
         return example
@@ -0,0 +1,23 @@
+'''@file encoded_string_writer.py
+contains the EncodedStringWriter class'''
+
+import tensorflow as tf
+import tfwriter
+
+class EncodedStringWriter(tfwriter.TfWriter):
+    '''a TfWriter to write strings that are encoded as integer arrays'''
+
+    def _get_example(self, data):
+        '''write data to a file
+
+        Args:
+            data: the data to be written as an integer numpy array'''
+
+        data_feature = tf.train.Feature(bytes_list=tf.train.BytesList(
+            value=[data.reshape([-1]).tostring()]))
+
+        #create the example proto
+        example = tf.train.Example(features=tf.train.Features(feature={
+            'data': data_feature}))
+
+        return example
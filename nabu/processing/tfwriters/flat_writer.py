@@ -0,0 +1,97 @@
+'''@file flat_writer.py
+contains the FlatWriter class'''
+
+import os
+import numpy as np
+import tfwriter
+
+class FlatWriter(tfwriter.TfWriter):
+    '''a writer that stores numpy arrays in a flat binary file
+
+    The arrays of a run are appended to one contiguous store file in the data
+    directory without any framing. The pointers file is the index of the
+    store, a pointer has the form store:offset:rows, where offset is the byte
+    offset of the array in the store and rows is its first dimension. The
+    other dimension is in the dim metadata file written by the processor.'''
+
+    def __init__(self, datadir, codec='float32', shard_size=None):
+        '''FlatWriter constructor
+
+        Args:
+            datadir: the directory where the data will be written
+            codec: the type the arrays are stored as, float32 or float16
+            shard_size: the size of a store in bytes after which a new store is
+                started, None to write a single store
+        '''
+
+        if codec not in ['float32', 'float16']:
+            raise Exception('codec %s is not supported by the flat store'
+                            % codec)
+
+        super(FlatWriter, self).__init__(datadir, shard_size=shard_size)
+
+        self.dtype = np.dtype(codec)
+        self.datadir = datadir
+        with open(os.path.join(datadir, 'codec'), 'w') as fid:
+            fid.write(codec)
+
+    def write(self, data, name):
+        '''write data to the store
+
+        Args:
+            data: the data to be written as a numpy array
+            name: the name of the data'''
+
+        #start a new store if the current one is full
+        if (self.writer is None or
+                (self.shard_size is not None and
+                 self.offset >= self.shard_size)):
+            self._next_shard()
+
+        data = np.ascontiguousarray(data, dtype=self.dtype)
+        self.writer.write(data.tostring())
+
+        #put a pointer in the scp file
+        self.scp_file.write('%s\t%s:%d:%d\n' % (
+            name, self.filename, self.offset, data.shape[0]))
+
+        self.offset += data.nbytes
+
+    def _next_shard(self):
+        '''close the current store and open a new one'''
+
+        if self.writer is not None:
+            self.writer.close()
+
+        self.filename = os.path.join(self.write_dir, 'shard%d' % self.shardnum)
+        self.shardnum += 1
+        self.writer = open(self.filename, 'wb')
+        self.offset = 0
+
+    def _shard(self, pointer):
+        '''get the store of a pointer'''
+
+        return pointer.rsplit(':', 2)[0]
+
+    def _live_bytes(self, filename, pointers):
+        '''the number of bytes of the arrays in a store, the dim metadata
+        should be written first
+
+        Args:
+            filename: the path to the store
+            pointers: the pointers of the arrays in the store
+
+        Returns:
+            the number of bytes'''
+
+        with open(os.path.join(self.datadir, 'dim')) as fid:
+            dim = int(fid.read())
+
+        rows = sum(int(pointer.rsplit(':', 1)[1]) for pointer in pointers)
+
+        return rows*dim*self.dtype.itemsize
+
+    def _get_example(self, data):
+        '''the flat store does not use examples'''
+
+        raise Exception('the flat store does not use examples')
@@ -0,0 +1,22 @@
+'''@file pointer_writer.py
+contains the PointerWriter class'''
+
+import tfwriter
+
+class PointerWriter(tfwriter.TfWriter):
+    '''a writer for data that is stored outside of the data directory (e.g.
+    kaldi archives), only the pointers to the data are written'''
+
+    def write(self, data, name):
+        '''write the pointer to the data
+
+        Args:
+            data: the pointer to the data as a string
+            name: the name of the data'''
+
+        self.scp_file.write('%s\t%s\n' % (name, data))
+
+    def _get_example(self, data):
+        '''the data is not written'''
+
+        raise Exception('the pointer writer does not write examples')
@@ -0,0 +1,26 @@
+'''@file raw_audio_writer.py
+contains the RawAudioWriter class'''
+
+import array_writer
+
+class RawAudioWriter(array_writer.ArrayWriter):
+    '''a TfWriter to write 16 bit audio samples'''
+
+    def __init__(self, datadir, codec='int16', shard_size=2**28):
+        '''RawAudioWriter constructor
+
+        Args:
+            datadir: the directory where the data will be written
+            codec: the codec used to store the samples, the raw audio reader
+                decodes the samples as 16 bit integers so only int16 is
+                supported
+            shard_size: the size of a record file in bytes after which a new
+                file is started
+        '''
+
+        if codec != 'int16':
+            raise Exception('codec %s is not supported for raw audio, the '
+                            'samples are stored as int16' % codec)
+
+        super(RawAudioWriter, self).__init__(
+            datadir, codec=codec, shard_size=shard_size)
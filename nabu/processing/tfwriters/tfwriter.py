@@ -2,34 +2,52 @@
 contains the TfWriter class'''
 
 import os
+import struct
 from abc import ABCMeta, abstractmethod
 import tensorflow as tf
 
 class TfWriter(object):
-    '''A class for writing the TF record files'''
+    '''A class for writing the TF record files
+
+    The examples are packed into large record files (shards), the pointers
+    file contains the shard and byte offset of every example'''
 
     __metaclass__ = ABCMeta
 
-    def __init__(self, datadir):
+    def __init__(self, datadir, shard_size=2**28):
         '''TfWriter constructor
 
         Args:
             datadir: the directory where the data will be written
+            shard_size: the size of a record file in bytes after which a new
+                file is started
         '''
 
         if not os.path.exists(datadir):
             #if the directory does not exist create it
             os.makedirs(datadir)
 
-        #store the path to the scp file
-        self.scp_file = os.path.join(datadir, 'pointers.scp')
+        #open the scp file that will contain the pointers to the examples
+        self.scp_file = open(os.path.join(datadir, 'pointers.scp'), 'a')
 
         #store te path to the write directory
         self.write_dir = os.path.join(datadir, 'data')
-        os.makedirs(self.write_dir)
+        if not os.path.isdir(self.write_dir):
+            os.makedirs(self.write_dir)
+
+        self.shard_size = shard_size
 
-        #set the current file number to 0
-        self.filenum = 0
+        #set the current shard number to the first shard that does not exist
+        #so data that was written before is not overwritten
+        self.shardnum = 0
+        while os.path.exists(
+                os.path.join(self.write_dir, 'shard%d' % self.shardnum)):
+            self.shardnum += 1
+
+        #the writer for the current shard and the offset of the next record
+        self.writer = None
+        self.filename = None
+        self.offset = 0
 
     def write(self, data, name):
         '''write data to a file
@@ -39,20 +57,107 @@ class TfWriter(object):
             name: the name of the data'''
 
         #creater the example
-        example = self._get_example(data)
+        serialized = self._get_example(data).SerializeToString()
 
-        #the filename for this example
-        filename = os.path.join(self.write_dir, 'file%d' % self.filenum)
-        self.filenum += 1
+        #start a new shard if the current one is full
+        if self.writer is None or self.offset >= self.shard_size:
+            self._next_shard()
 
-        #write the example to file
-        writer = tf.python_io.TFRecordWriter(filename)
-        writer.write(example.SerializeToString())
-        writer.close()
+        #write the example to the shard
+        self.writer.write(serialized)
 
         #put a pointer in the scp file
-        with open(self.scp_file, 'a') as fid:
-            fid.write('%s\t%s\n' % (name, filename))
+        self.scp_file.write('%s\t%s:%d\n' % (name, self.filename, self.offset))
+
+        #a record consists of a length (8 bytes), a length crc (4 bytes), the
+        #data and a data crc (4 bytes)
+        self.offset += len(serialized) + 16
+
+    def flush(self):
+        '''flush the current shard and the scp file to disk'''
+
+        if self.writer is not None:
+            self.writer.flush()
+
+        self.scp_file.flush()
+
+    def close(self):
+        '''close the current shard and the scp file'''
+
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+        self.scp_file.close()
+
+    def compact(self, pointers):
+        '''remove the shards that do not contain any of the live examples, the
+        writer should be closed first
+
+        Args:
+            pointers: the pointers of the live examples
+
+        Returns:
+            - the number of bytes in the removed shards
+            - the number of bytes of the examples that are no longer used in
+                the shards that are kept
+        '''
+
+        #group the pointers by shard, the paths are resolved so a data
+        #directory that is given with a different path is not removed
+        live = dict()
+        for pointer in pointers:
+            filename = os.path.realpath(self._shard(pointer))
+            live.setdefault(filename, []).append(pointer)
+
+        removed = 0
+        dead = 0
+        for shard in os.listdir(self.write_dir):
+            if not shard.startswith('shard'):
+                continue
+            filename = os.path.realpath(os.path.join(self.write_dir, shard))
+            size = os.path.getsize(filename)
+            if filename in live:
+                dead += size - self._live_bytes(filename, live[filename])
+            else:
+                os.remove(filename)
+                removed += size
+
+        return removed, dead
+
+    def _shard(self, pointer):
+        '''get the shard of a pointer'''
+
+        return pointer.rsplit(':', 1)[0]
+
+    def _live_bytes(self, filename, pointers):
+        '''the number of bytes of the examples in a shard
+
+        Args:
+            filename: the path to the shard
+            pointers: the pointers of the examples in the shard
+
+        Returns:
+            the number of bytes'''
+
+        nbytes = 0
+        with open(filename, 'rb') as fid:
+            for pointer in pointers:
+                fid.seek(int(pointer.rsplit(':', 1)[1]))
+                nbytes += struct.unpack('<Q', fid.read(8))[0] + 16
+
+        return nbytes
+
+    def _next_shard(self):
+        '''close the current shard and open a new one'''
+
+        if self.writer is not None:
+            self.writer.close()
+
+        self.filename = os.path.join(self.write_dir, 'shard%d' % self.shardnum)
+        self.shardnum += 1
+        self.writer = tf.python_io.TFRecordWriter(self.filename)
+        self.offset = 0
 
     @abstractmethod
     def _get_example(self, data):
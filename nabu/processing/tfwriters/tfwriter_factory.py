@@ -1,7 +1,8 @@
 '''@file tfwriter_factory
 contains the tfwriter factory'''
 
-from . import array_writer, string_writer, binary_writer, alignment_writer
+from . import array_writer, string_writer, binary_writer, alignment_writer, \
+encoded_string_writer, flat_writer, pointer_writer, raw_audio_writer
 
 def factory(datatype):
     '''
@@ -20,5 +21,13 @@ def factory(datatype):
         return binary_writer.BinaryWriter
     elif datatype == 'alignment':
         return alignment_writer.AlignmentWriter
+    elif datatype == 'encoded_string':
+        return encoded_string_writer.EncodedStringWriter
+    elif datatype == 'flat_audio_feature':
+        return flat_writer.FlatWriter
+    elif datatype in ['kaldi_feature', 'kaldi_alignment']:
+        return pointer_writer.PointerWriter
+    elif datatype == 'raw_audio':
+        return raw_audio_writer.RawAudioWriter
     else:
         raise Exception('unknown data type: %s' % datatype)
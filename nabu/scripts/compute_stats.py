@@ -0,0 +1,323 @@
+'''@file compute_stats.py
+computes the statistics of a prepared data directory in a single pass'''
+
+import os
+import multiprocessing
+import numpy as np
+import tensorflow as tf
+from nabu.processing.tfreaders import tfreader_factory
+
+#the data types the statistics can be computed for, alignments get pdf counts
+#and features get their moments
+ALIGNMENT_TYPES = ['alignment', 'kaldi_alignment']
+FEATURE_TYPES = ['audio_feature', 'flat_audio_feature', 'kaldi_feature',
+                 'raw_audio']
+
+def main(datadir, datatype, utt2spk=None, nworkers=1, chunk_size=256):
+    '''compute the statistics of the data in datadir and write them to datadir
+
+    The examples are read with the tfreader of the data type. For alignments
+    the pdf counts and the prior are computed, for features the global and
+    per speaker mean and standard deviation and the minimum and maximum of
+    every dimension. For all data a histogram of the lengths of the read
+    examples is written to stats_length_histogram.npy, the length metadata of
+    the data directory is not changed (for raw audio the lengths are feature
+    frames while the metadata is in samples). The examples are read in chunks
+    by a pool of worker processes, only the accumulated statistics are kept in
+    memory.
+
+    Args:
+        datadir: the prepared data directory
+        datatype: the type of the data, one of ALIGNMENT_TYPES or
+            FEATURE_TYPES
+        utt2spk: the path to a file mapping the utterances to their speakers,
+            if None no per speaker statistics are computed
+        nworkers: the number of worker processes
+        chunk_size: the number of examples a worker reads at once
+    '''
+
+    if datatype not in ALIGNMENT_TYPES + FEATURE_TYPES:
+        raise Exception(
+            'the statistics of %s data can not be computed, the type should '
+            'be one of %s' % (datatype, ', '.join(
+                ALIGNMENT_TYPES + FEATURE_TYPES)))
+
+    #read the speakers of the utterances
+    speakers = dict()
+    if utt2spk is not None:
+        with open(utt2spk) as fid:
+            for line in fid:
+                split = line.strip().split(' ')
+                if len(split) == 2:
+                    speakers[split[0]] = split[1]
+
+    chunks = _chunks(
+        os.path.join(datadir, 'pointers.scp'), speakers, chunk_size)
+
+    stats = Statistics()
+    if nworkers > 1:
+        pool = multiprocessing.Pool(
+            nworkers, _init_worker, (datadir, datatype))
+        try:
+            for chunk_stats in pool.imap_unordered(_read_chunk, chunks):
+                stats.merge(chunk_stats)
+            pool.close()
+        except BaseException:
+            #stop the workers if a chunk could not be read or the computation
+            #was interrupted
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+    else:
+        _init_worker(datadir, datatype)
+        for chunk in chunks:
+            stats.merge(_read_chunk(chunk))
+
+    print 'computed the statistics of %d utterances' % stats.utterances
+
+    #the dimension of alignments is the number of pdfs, pdfs that did not
+    #occur get a zero count
+    dim = None
+    if os.path.exists(os.path.join(datadir, 'dim')):
+        with open(os.path.join(datadir, 'dim')) as fid:
+            dim = int(fid.read())
+
+    stats.write(datadir, dim)
+
+class Statistics(object):
+    '''the accumulated statistics of a set of examples'''
+
+    def __init__(self):
+        '''Statistics constructor'''
+
+        self.utterances = 0
+        self.sequence_length_histogram = np.zeros(0, dtype=np.int64)
+
+        #the pdf counts of the alignments
+        self.counts = None
+
+        #the number of frames, the sum and the squared sum of the features
+        #and the minimum and maximum of every dimension
+        self.moments = None
+        self.minimum = None
+        self.maximum = None
+
+        #the moments of every speaker
+        self.speakers = dict()
+
+    def add(self, data, speaker=None):
+        '''add an example to the statistics
+
+        Args:
+            data: the example as a numpy array, a vector for alignments and a
+                [seq_length x dim] matrix for features
+            speaker: the speaker of the example, None if unknown
+        '''
+
+        self.utterances += 1
+        self._add_length(data.shape[0])
+
+        if data.ndim == 1:
+            counts = np.bincount(data)
+            if self.counts is None:
+                self.counts = counts
+            else:
+                self.counts = _add_padded(self.counts, counts)
+            return
+
+        data = data.astype(np.float64)
+        moments = _moments(data)
+        self.moments = _add_moments(self.moments, moments)
+        if speaker is not None:
+            self.speakers[speaker] = _add_moments(
+                self.speakers.get(speaker), moments)
+
+        if self.minimum is None:
+            self.minimum = data.min(0)
+            self.maximum = data.max(0)
+        elif data.shape[0]:
+            self.minimum = np.minimum(self.minimum, data.min(0))
+            self.maximum = np.maximum(self.maximum, data.max(0))
+
+    def merge(self, other):
+        '''merge the statistics of other into these statistics
+
+        Args:
+            other: an other Statistics object
+        '''
+
+        self.utterances += other.utterances
+        self.sequence_length_histogram = _add_padded(
+            self.sequence_length_histogram, other.sequence_length_histogram)
+
+        if other.counts is not None:
+            if self.counts is None:
+                self.counts = other.counts
+            else:
+                self.counts = _add_padded(self.counts, other.counts)
+
+        if other.moments is not None:
+            self.moments = _add_moments(self.moments, other.moments)
+            if self.minimum is None:
+                self.minimum = other.minimum
+                self.maximum = other.maximum
+            else:
+                self.minimum = np.minimum(self.minimum, other.minimum)
+                self.maximum = np.maximum(self.maximum, other.maximum)
+
+        for speaker, moments in other.speakers.items():
+            self.speakers[speaker] = _add_moments(
+                self.speakers.get(speaker), moments)
+
+    def write(self, datadir, dim=None):
+        '''write the statistics to the data directory
+
+        Args:
+            datadir: the directory where the statistics should be written
+            dim: the number of pdfs of alignments, if None the largest pdf
+                that occured determines the number of pdfs
+        '''
+
+        #the lengths are written to a seperate file, the length metadata of
+        #the processor is used by the readers and the bucketing
+        with open(os.path.join(datadir, 'stats_length_histogram.npy'),
+                  'w') as fid:
+            np.save(fid, self.sequence_length_histogram)
+
+        if self.counts is not None:
+            counts = self.counts
+            if dim is not None and dim > counts.shape[0]:
+                counts = _add_padded(counts, np.zeros([dim], dtype=np.int64))
+            with open(os.path.join(datadir, 'counts.npy'), 'w') as fid:
+                np.save(fid, counts)
+            with open(os.path.join(datadir, 'prior.npy'), 'w') as fid:
+                np.save(fid, counts.astype(np.float32)/counts.sum())
+
+        if self.moments is not None:
+            mean, std = _normalize(self.moments)
+            for filename, stat in [('mean', mean), ('std', std),
+                                   ('min', self.minimum),
+                                   ('max', self.maximum)]:
+                with open(os.path.join(datadir, filename + '.npy'), 'w') as fid:
+                    np.save(fid, stat.astype(np.float32))
+
+        if self.speakers:
+            speakers = sorted(self.speakers.keys())
+            normalized = [_normalize(self.speakers[s]) for s in speakers]
+            with open(os.path.join(datadir, 'speaker_cmvn.npz'), 'w') as fid:
+                np.savez(
+                    fid,
+                    speakers=np.array(speakers),
+                    frames=np.array([self.speakers[s][0] for s in speakers]),
+                    mean=np.array([n[0] for n in normalized], np.float32),
+                    std=np.array([n[1] for n in normalized], np.float32))
+
+    def _add_length(self, seq_length):
+        '''add a sequence length to the histogram'''
+
+        if seq_length >= self.sequence_length_histogram.shape[0]:
+            self.sequence_length_histogram = np.concatenate(
+                [self.sequence_length_histogram,
+                 np.zeros(seq_length + 1 -
+                          self.sequence_length_histogram.shape[0],
+                          dtype=np.int64)])
+        self.sequence_length_histogram[seq_length] += 1
+
+def _moments(data):
+    '''the number of frames, the sum and the squared sum of features'''
+
+    return data.shape[0], data.sum(0), np.square(data).sum(0)
+
+def _add_moments(moments, other):
+    '''add two sets of moments, moments can be None'''
+
+    if moments is None:
+        return other
+
+    return (moments[0] + other[0], moments[1] + other[1],
+            moments[2] + other[2])
+
+def _normalize(moments):
+    '''compute the mean and the standard deviation from the moments'''
+
+    frames = max(moments[0], 1)
+    mean = moments[1]/frames
+    std = np.sqrt(np.maximum(moments[2]/frames - np.square(mean), 0))
+
+    return mean, std
+
+def _add_padded(first, second):
+    '''add two vectors of different lengths by padding the shortest one'''
+
+    if first.shape[0] < second.shape[0]:
+        first, second = second, first
+    result = first.astype(np.int64)
+    result[:second.shape[0]] += second
+
+    return result
+
+def _chunks(scp_file, speakers, chunk_size):
+    '''read the pointers file in chunks
+
+    Args:
+        scp_file: the path to the pointers file
+        speakers: a dictionary mapping utterance names to speakers
+        chunk_size: the number of examples in a chunk
+
+    Yields:
+        the chunks as lists of (pointer, speaker)
+    '''
+
+    chunk = []
+    with open(scp_file) as fid:
+        for line in fid:
+            name, pointer = line.strip().split('\t')
+            chunk.append((pointer, speakers.get(name)))
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+
+    if chunk:
+        yield chunk
+
+#the reader of the process, created once for every worker so the opened
+#files are reused
+_reader = None
+
+def _init_worker(datadir, datatype):
+    '''create the reader of the process
+
+    Args:
+        datadir: the prepared data directory
+        datatype: the type of the data
+    '''
+
+    global _reader
+    _reader = tfreader_factory.factory(datatype)([datadir])
+
+def _read_chunk(chunk):
+    '''read the examples in a chunk and compute their statistics
+
+    Args:
+        chunk: the chunk as a list of (pointer, speaker)
+
+    Returns:
+        the statistics of the chunk
+    '''
+
+    stats = Statistics()
+    for pointer, speaker in chunk:
+        stats.add(_reader.read_array(pointer), speaker)
+
+    return stats
+
+if __name__ == '__main__':
+    tf.app.flags.DEFINE_string('datadir', None, 'The prepared data directory')
+    tf.app.flags.DEFINE_string('type', 'audio_feature', 'The type of the data')
+    tf.app.flags.DEFINE_string('utt2spk', None,
+                               'A file mapping utterances to speakers')
+    tf.app.flags.DEFINE_integer('nworkers', 1, 'The number of processes')
+    FLAGS = tf.app.flags.FLAGS
+
+    main(FLAGS.datadir, FLAGS.type, FLAGS.utt2spk, FLAGS.nworkers)
@@ -4,12 +4,36 @@ does the data preperation'''
 import os
 from six.moves import configparser
 import gzip
+import hashlib
+import itertools
+import multiprocessing
+import numpy as np
 import tensorflow as tf
+from nabu.processing import pointer_index
 from nabu.processing.processors import processor_factory
 from nabu.processing.tfwriters import tfwriter_factory
 
+#the processor options that only change how the data is processed and not the
+#processed data, they are not part of the manifest hash and the cache key
+RUNTIME_OPTIONS = ['pipe_processes', 'pipe_timeout', 'batch_size',
+                   'batch_frames', 'recording_cache_size']
+
+#the data types whose writers can store the data with a codec
+CODEC_TYPES = ['audio_feature', 'flat_audio_feature']
+
 def main(expdir):
-    '''main function'''
+    '''main function
+
+    The processed utterances are kept in a manifest in the data directory,
+    together with a fingerprint of their source and a hash of the processor
+    configuration. Utterances that were processed before with the same source
+    and configuration are not processed again.
+
+    If the section contains a cache directory, the processed data is also
+    stored in the cache with a key of the source fingerprint and the
+    processor configuration. Data directories that share the cache (e.g.
+    different recipes on the same database) read the data from the cache
+    instead of processing it again.'''
 
     #read the data conf file
     parsed_cfg = configparser.ConfigParser()
@@ -29,11 +53,161 @@ def main(expdir):
     processor = processor_factory.factory(
         proc_cfg.get('processor', 'processor'))(proc_cfg)
 
-    #create a writer
-    writer = tfwriter_factory.factory(conf['type'])(conf['dir'])
+    #create a writer, the codec the data is stored with can be set in the
+    #section
+    if 'codec' in conf:
+        if conf['type'] not in CODEC_TYPES:
+            raise Exception(
+                'the codec of %s can not be set, a codec can only be used for '
+                '%s data' % (name, ', '.join(CODEC_TYPES)))
+        writer = tfwriter_factory.factory(conf['type'])(
+            conf['dir'], codec=conf['codec'])
+    else:
+        writer = tfwriter_factory.factory(conf['type'])(conf['dir'])
+
+    #read the manifest of the previously processed utterances
+    manifest_file = os.path.join(conf['dir'], 'manifest')
+    manifest = _read_manifest(manifest_file)
+    confhash = _config_hash(
+        proc_cfg, conf.get('codec'), exclude=RUNTIME_OPTIONS)
+
+    #the shared cache of processed data
+    cache_dir = conf.get('cache')
+    if cache_dir is not None and not processor.cacheable():
+        print 'the data of %s can not be cached, ignoring the cache' % (
+            type(processor).__name__)
+        cache_dir = None
+    if cache_dir is not None:
+        cachehash = _config_hash(proc_cfg, exclude=RUNTIME_OPTIONS)
+
+    #check which utterances should be processed, the metadata of the
+    #utterances that are kept is added to the processor
+    names = []
+    entries = dict()
+    todo = []
+    cached = []
+    for name, dataline in _lines(conf['datafiles']):
+        names.append(name)
+        fingerprint = hashlib.md5(processor.fingerprint(dataline)).hexdigest()
+        if name in manifest and manifest[name][:2] == (fingerprint, confhash):
+            entries[name] = manifest[name]
+            if manifest[name][2] >= 0:
+                processor.add_length(manifest[name][2])
+        elif cache_dir is not None and os.path.exists(
+                _cache_file(cache_dir, fingerprint, cachehash)):
+            cached.append((name, fingerprint))
+        else:
+            todo.append((name, dataline, fingerprint))
+
+    print ('%d utterances were processed before, %d utterances are read from '
+           'the cache, processing %d utterances' % (
+               len(names) - len(todo) - len(cached), len(cached), len(todo)))
+
+    #process the segments of the same recording together so the recording is
+    #only decoded once
+    todo = _group(todo, processor)
+
+    #the number of processes that are used to process the data
+    if 'nworkers' in conf:
+        nworkers = int(conf['nworkers'])
+    else:
+        nworkers = 1
+
+    if nworkers > 1:
+
+        #the number of lines in a shard
+        if 'shard_size' in conf:
+            shard_size = int(conf['shard_size'])
+        else:
+            shard_size = 256
+
+        results = _process_parallel(
+            _shards(todo, processor, shard_size),
+            os.path.join(expdir, 'processor.cfg'), processor, nworkers)
+
+    else:
+
+        results = _process(todo, processor)
+
+    if cached:
+        results = itertools.chain(
+            _read_cache(cached, cache_dir, cachehash), results)
+    cached = set(name for name, _ in cached)
+
+    #write the processed data to disk and add the utterances to the manifest
+    #regularly so the processing can be resumed if it is interrupted
+    manifest_fid = open(manifest_file, 'a')
+    pending = []
+    failed = 0
+    for name, fingerprint, processed in results:
+
+        if isinstance(processed, Exception):
+            #the utterance is not added to the manifest so it is processed
+            #again in the next run
+            print 'could not process %s: %s' % (name, processed)
+            failed += 1
+            continue
+        elif processed is None:
+            seq_length = -1
+        else:
+            writer.write(processed, name)
+            seq_length = processor.get_length(processed)
+            if name in cached:
+                #the metadata of data from the cache is not in the processor
+                processor.add_length(seq_length)
+            elif cache_dir is not None:
+                _write_cache(cache_dir, fingerprint, cachehash, processed)
+
+        entries[name] = (fingerprint, confhash, seq_length)
+        pending.append(name)
+
+        if len(pending) == 100:
+            _checkpoint(writer, manifest_fid, pending, entries)
+            pending = []
+
+    _checkpoint(writer, manifest_fid, pending, entries)
+    manifest_fid.close()
+    writer.close()
+
+    if failed:
+        print ('%d utterances could not be processed, run the data preperation '
+               'again to retry them' % failed)
+
+    #only keep the utterances that are in the datafiles and that were
+    #processed
+    names = [name for name in names if name in entries]
+    _write_manifest(manifest_file, names, entries)
+    pointers = _write_pointers(
+        os.path.join(conf['dir'], 'pointers.scp'), names, entries)
+
+    #compile the pointers into an index so the input pipeline does not have
+    #to parse the pointers file
+    pointer_index.write_index(conf['dir'])
+
+    #write the metadata to file
+    processor.write_metadata(conf['dir'])
+
+    #the data that was written before for utterances that were processed again
+    #or removed stays in the shards, remove the shards that are no longer used
+    removed, dead = writer.compact(pointers)
+    if removed:
+        print '%d bytes of shards that are no longer used were removed' % (
+            removed)
+    if dead:
+        print ('%d bytes in the shards are no longer used, prepare the data in '
+               'a new directory to reclaim them' % dead)
+
+def _lines(datafiles):
+    '''read the lines in the datafiles
+
+    Args:
+        datafiles: a space seperated list of datafiles
+
+    Yields:
+        the name and the dataline for every line in the datafiles'''
 
     #loop over the data files
-    for datafile in conf['datafiles'].split(' '):
+    for datafile in datafiles.split(' '):
 
         if datafile[-3:] == '.gz':
             open_fn = gzip.open
@@ -48,15 +222,307 @@ def main(expdir):
             name = splitline[0]
             dataline = ' '.join(splitline[1:])
 
-            #process the dataline
-            processed = processor(dataline)
+            yield name, dataline
 
-            #write the processed data to disk
-            if processed is not None:
-                writer.write(processed, name)
+def _process(todo, processor):
+    '''process the utterances
 
-    #write the metadata to file
-    processor.write_metadata(conf['dir'])
+    Args:
+        todo: the utterances as a list of (name, dataline, fingerprint)
+        processor: the processor
+
+    Yields:
+        the name, fingerprint and processed data of every utterance, the
+        processed data is None if the processor discarded it or an Exception
+        if it could not be processed'''
+
+    processed = processor.process_all([dataline for _, dataline, _ in todo])
+    for name, _, fingerprint in todo:
+        yield name, fingerprint, next(processed)
+
+def _process_parallel(shards, proc_cfg_file, processor, nworkers):
+    '''process the utterances in shards with a pool of worker processes
+
+    Args:
+        shards: the shards as lists of (name, dataline, fingerprint)
+        proc_cfg_file: the path to the processor config
+        processor: the processor the metadata of the shards is merged into
+        nworkers: the number of worker processes
+
+    Yields:
+        the name, fingerprint and processed data of every utterance in the
+        order of the shards, the processed data is None if the processor
+        discarded it or an Exception if it could not be processed'''
+
+    shards = ((proc_cfg_file, shard) for shard in shards)
+
+    #imap returns the results in the order of the shards so the pointers are
+    #written deterministically
+    pool = multiprocessing.Pool(nworkers)
+    try:
+        for processed, shard_processor in pool.imap(_process_shard, shards):
+
+            #merge the shard metadata
+            processor.merge_metadata(shard_processor)
+
+            for result in processed:
+                yield result
+
+        pool.close()
+    except BaseException:
+        #stop the workers if the processing failed, was interrupted or the
+        #results are no longer read
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+def _group(todo, processor):
+    '''group the utterances that are part of the same recording, the groups
+    are ordered by their first utterance
+
+    Args:
+        todo: the utterances as a list of (name, dataline, fingerprint)
+        processor: the processor
+
+    Returns:
+        the grouped utterances as a list of (name, dataline, fingerprint)'''
+
+    groups = dict()
+    order = []
+    for utt in todo:
+        recording = processor.recording(utt[1])
+        if recording is None:
+            order.append([utt])
+        elif recording in groups:
+            groups[recording].append(utt)
+        else:
+            groups[recording] = [utt]
+            order.append(groups[recording])
+
+    return [utt for group in order for utt in group]
+
+def _shards(todo, processor, shard_size):
+    '''divide the utterances into shards, the utterances of the same
+    recording are put in the same shard
+
+    Args:
+        todo: the grouped utterances as a list of (name, dataline, fingerprint)
+        processor: the processor
+        shard_size: the number of utterances after which a new shard is started
+
+    Yields:
+        the shards as lists of (name, dataline, fingerprint)'''
+
+    shard = []
+    for utt in todo:
+        recording = processor.recording(utt[1])
+        if (len(shard) >= shard_size and
+                (recording is None or
+                 recording != processor.recording(shard[-1][1]))):
+            yield shard
+            shard = []
+        shard.append(utt)
+
+    if shard:
+        yield shard
+
+def _process_shard(args):
+    '''process a shard of utterances in a worker process
+
+    Args:
+        args: a pair containing the path to the processor config and the shard
+            as a list of (name, dataline, fingerprint)
+
+    Returns:
+        - the processed data as a list of (name, fingerprint, data)
+        - the processor containing the metadata of the shard'''
+
+    proc_cfg_file, shard = args
+
+    #read the processor config
+    proc_cfg = configparser.ConfigParser()
+    proc_cfg.read(proc_cfg_file)
+
+    #create a processor for this shard
+    processor = processor_factory.factory(
+        proc_cfg.get('processor', 'processor'))(proc_cfg)
+
+    return list(_process(shard, processor)), processor
+
+def _read_cache(cached, cache_dir, cachehash):
+    '''read processed data from the cache
+
+    Args:
+        cached: the utterances in the cache as a list of (name, fingerprint)
+        cache_dir: the cache directory
+        cachehash: the hash of the processor configuration
+
+    Yields:
+        the name, fingerprint and processed data of every utterance, the
+        processed data is an Exception if it could not be read'''
+
+    for name, fingerprint in cached:
+        try:
+            processed = np.load(_cache_file(cache_dir, fingerprint, cachehash))
+        except Exception as exception:
+            processed = Exception('could not read from the cache: %s'
+                                  % exception)
+        yield name, fingerprint, processed
+
+def _write_cache(cache_dir, fingerprint, cachehash, processed):
+    '''add processed data to the cache
+
+    Args:
+        cache_dir: the cache directory
+        fingerprint: the fingerprint of the source of the data
+        cachehash: the hash of the processor configuration
+        processed: the processed data as a numpy array'''
+
+    cache_file = _cache_file(cache_dir, fingerprint, cachehash)
+    if not os.path.isdir(os.path.dirname(cache_file)):
+        try:
+            os.makedirs(os.path.dirname(cache_file))
+        except OSError:
+            #the directory was created by an other process
+            pass
+
+    #the data is written to a temporary file first so other processes that
+    #share the cache never read a partially written file
+    tmp_file = '%s.%d.tmp' % (cache_file, os.getpid())
+    with open(tmp_file, 'wb') as fid:
+        np.save(fid, processed)
+    os.rename(tmp_file, cache_file)
+
+def _cache_file(cache_dir, fingerprint, cachehash):
+    '''the path to the cached data of an utterance
+
+    Args:
+        cache_dir: the cache directory
+        fingerprint: the fingerprint of the source of the data
+        cachehash: the hash of the processor configuration
+
+    Returns:
+        the path to the cache file, the files are divided over subdirectories
+        to keep the directories small'''
+
+    key = hashlib.md5(fingerprint + cachehash).hexdigest()
+
+    return os.path.join(cache_dir, key[:2], key + '.npy')
+
+def _config_hash(proc_cfg, codec=None, exclude=()):
+    '''compute a hash of the processor configuration
+
+    Args:
+        proc_cfg: the processor configuration as a configparser
+        codec: the codec the data is stored with, None for the default codec
+            of the writer
+        exclude: the options in the processor section that are not part of
+            the hash
+
+    Returns:
+        the hash as a string'''
+
+    items = [(section, sorted(item for item in proc_cfg.items(section)
+                              if section != 'processor' or
+                              item[0] not in exclude))
+             for section in sorted(proc_cfg.sections())]
+
+    #data that is stored with an other codec has to be written again
+    if codec not in [None, 'float32']:
+        items.append(('codec', codec))
+
+    return hashlib.md5(repr(items)).hexdigest()
+
+def _read_manifest(manifest_file):
+    '''read the manifest
+
+    Args:
+        manifest_file: the path to the manifest
+
+    Returns:
+        a dictionary mapping the utterance names to the fingerprint, the
+        processor configuration hash and the sequence length (-1 if the
+        processor discarded the utterance)'''
+
+    manifest = dict()
+
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as fid:
+            for line in fid:
+                split = line.strip().split('\t')
+                if len(split) == 4:
+                    manifest[split[0]] = (split[1], split[2], int(split[3]))
+
+    return manifest
+
+def _checkpoint(writer, manifest_fid, names, entries):
+    '''flush the written data and add the utterances to the manifest
+
+    Args:
+        writer: the tfwriter
+        manifest_fid: the opened manifest file
+        names: the names of the utterances that should be added
+        entries: the manifest entries'''
+
+    writer.flush()
+
+    for name in names:
+        manifest_fid.write('%s\t%s\t%s\t%d\n' % ((name,) + entries[name]))
+
+    manifest_fid.flush()
+
+def _write_manifest(manifest_file, names, entries):
+    '''write the manifest for the utterances in names
+
+    Args:
+        manifest_file: the path to the manifest
+        names: the names of the utterances in order
+        entries: the manifest entries'''
+
+    with open(manifest_file + '.tmp', 'w') as fid:
+        for name in _unique(names):
+            fid.write('%s\t%s\t%s\t%d\n' % ((name,) + entries[name]))
+
+    os.rename(manifest_file + '.tmp', manifest_file)
+
+def _write_pointers(scp_file, names, entries):
+    '''rewrite the pointers file so it only contains the latest pointers of
+    the utterances in names
+
+    Args:
+        scp_file: the path to the pointers file
+        names: the names of the utterances in order
+        entries: the manifest entries
+
+    Returns:
+        the pointers that are in the rewritten pointers file'''
+
+    pointers = dict()
+    with open(scp_file) as fid:
+        for line in fid:
+            name, pointer = line.strip().split('\t')
+            pointers[name] = pointer
+
+    live = []
+    with open(scp_file + '.tmp', 'w') as fid:
+        for name in _unique(names):
+            if entries[name][2] >= 0:
+                fid.write('%s\t%s\n' % (name, pointers[name]))
+                live.append(pointers[name])
+
+    os.rename(scp_file + '.tmp', scp_file)
+
+    return live
+
+def _unique(names):
+    '''the names without duplicates in the order of their first occurence'''
+
+    seen = set()
+    for name in names:
+        if name not in seen:
+            seen.add(name)
+            yield name
 
 if __name__ == '__main__':
     tf.app.flags.DEFINE_string('expdir', 'expdir', 'The experiments directory')
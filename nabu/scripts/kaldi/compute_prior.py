@@ -1,22 +1,29 @@
 '''@file counpute_prior.py
-this script can be used to compute pdf priors for kaldi'''
+this script can be used to compute pdf priors for kaldi
+
+The pdfs file is read line by line and the pdfs are counted with bincount so
+the memory does not grow with the size of the file. To compute the prior of a
+prepared alignment directory use nabu/scripts/compute_stats.py'''
 
 import os
 import sys
-import itertools
 import numpy as np
 
 traindir = sys.argv[1]
 
-#read the pdffile
-with open(os.path.join(traindir, 'pdfs')) as fid:
-    pdfs = fid.readlines()
-pdfs = [pdf.split()[1:] for pdf in pdfs]
-pdfs = list(itertools.chain.from_iterable(pdfs))
-pdfs = map(int, pdfs)
-
 #count each pdf occurrence
-counts, _ = np.histogram(pdfs, range(max(pdfs)+2))
+counts = np.zeros(0, dtype=np.int64)
+with open(os.path.join(traindir, 'pdfs')) as fid:
+    for line in fid:
+        pdfs = np.array(line.split()[1:], dtype=np.int64)
+        if not pdfs.size:
+            continue
+        line_counts = np.bincount(pdfs)
+        if line_counts.shape[0] > counts.shape[0]:
+            counts = np.concatenate(
+                [counts,
+                 np.zeros(line_counts.shape[0] - counts.shape[0], np.int64)])
+        counts[:line_counts.shape[0]] += line_counts
 
 #normalize the counts to get the priors
 prior = counts.astype(np.float32)/counts.sum()
@@ -0,0 +1,49 @@
+'''@file learn_subwords.py
+learns the merge table and the alphabet of the subword normalizer'''
+
+from collections import defaultdict
+import tensorflow as tf
+from nabu.processing.target_normalizers import subword
+
+def main(textfiles, num_merges, merges, alphabet):
+    '''learn a merge table from transcriptions
+
+    Args:
+        textfiles: a space seperated list of files with a name and a
+            transcription on every line
+        num_merges: the number of merges
+        merges: the path where the merge table is written
+        alphabet: the path where the alphabet is written, the alphabet
+            contains all subword units of the words in the transcriptions
+    '''
+
+    #count the words
+    counts = defaultdict(int)
+    for textfile in textfiles.split(' '):
+        with open(textfile) as fid:
+            for line in fid:
+                for word in line.lower().split()[1:]:
+                    counts[word] += 1
+
+    table = subword.learn_merges(counts, num_merges)
+    subword.write_merges(table, merges)
+
+    #the alphabet contains the units of the words the table was learned on
+    units = subword.subword_units(counts, table)
+
+    with open(alphabet, 'w') as fid:
+        fid.write(' '.join(sorted(units) + ['<unk>']))
+
+    print 'learned %d merges, the alphabet contains %d units' % (
+        len(table), len(units) + 1)
+
+if __name__ == '__main__':
+    tf.app.flags.DEFINE_string('text', None, 'The transcription files')
+    tf.app.flags.DEFINE_integer('num_merges', 1000, 'The number of merges')
+    tf.app.flags.DEFINE_string('merges', None,
+                               'The path where the merge table is written')
+    tf.app.flags.DEFINE_string('alphabet', None,
+                               'The path where the alphabet is written')
+    FLAGS = tf.app.flags.FLAGS
+
+    main(FLAGS.text, FLAGS.num_merges, FLAGS.merges, FLAGS.alphabet)
@@ -37,9 +37,11 @@ def main(expdir, recipe, computing):
         #read the section
         conf = dict(parsed_cfg.items(name))
 
+        #if the data directory exists it is only updated if it contains a
+        #manifest of the processed utterances
         if not os.path.exists(conf['dir']):
             os.makedirs(conf['dir'])
-        else:
+        elif not os.path.exists(os.path.join(conf['dir'], 'manifest')):
             print '%s already exists, skipping this section' % conf['dir']
             continue
 